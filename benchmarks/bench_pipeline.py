@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+Detection -> crop -> emotion benchmark for the shared vision_core pipeline
+
+Runs the same detect/crop/analyze path the server and desktop tool use over a fixed set of
+synthetic frames and writes per-stage latency percentiles, throughput and
+peak RSS as JSON. Use --stub for fast CPU-only runs without model weights.
+
+Examples:
+    python benchmarks/bench_pipeline.py --stub
+    python benchmarks/bench_pipeline.py --stub --save-baseline benchmarks/baseline_stub.json
+    python benchmarks/bench_pipeline.py --stub --baseline benchmarks/baseline_stub.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+from datetime import datetime
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCH_DIR)
+sys.path.insert(0, os.path.join(BENCH_DIR, '..', 'emotion_server'))
+sys.path.insert(0, os.path.join(BENCH_DIR, '..'))
+
+from frames import make_frame_set, RESOLUTIONS, FACE_COUNTS
+from stub_backend import StubFaceDetector, stub_analyze_emotions
+from vision_core import boxes_from_results, crop_faces
+
+STAGES = ('detect', 'crop', 'analyze', 'total')
+PERCENTILES = (50, 90, 99)
+
+
+# ============ PIPELINE ============
+def run_frame(detector, analyze, frame, conf, known_boxes=None):
+    """Run one frame through the pipeline, returning (per-stage seconds, faces detected).
+
+    With known_boxes, crop and analyze use them instead of the detections, so
+    they measure real work even when the detector finds nothing in a
+    synthetic frame.
+    """
+    timings = {}
+    start = time.perf_counter()
+    boxes = boxes_from_results(detector(frame, verbose=False, conf=conf))
+    after_detect = time.perf_counter()
+    detected = len(boxes)
+    if known_boxes is not None:
+        boxes = known_boxes
+    boxes, crops = crop_faces(frame, boxes)
+    after_crop = time.perf_counter()
+    analyze(crops)
+    end = time.perf_counter()
+
+    timings['detect'] = after_detect - start
+    timings['crop'] = after_crop - after_detect
+    timings['analyze'] = end - after_crop
+    timings['total'] = end - start
+    return timings, detected
+
+
+# ============ MEASUREMENT ============
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    rank = (len(sorted_values) - 1) * pct / 100.0
+    low = int(rank)
+    high = min(low + 1, len(sorted_values) - 1)
+    return sorted_values[low] + (sorted_values[high] - sorted_values[low]) * (rank - low)
+
+
+def summarize(samples):
+    values = sorted(samples)
+    summary = {f'p{pct}_ms': percentile(values, pct) * 1000 for pct in PERCENTILES}
+    summary['mean_ms'] = (sum(values) / len(values) * 1000) if values else 0.0
+    return summary
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB, or None if unavailable"""
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is kilobytes on Linux and bytes on macOS
+        return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+    except ImportError:
+        pass
+    try:
+        import psutil
+        info = psutil.Process().memory_info()
+        return getattr(info, 'peak_wset', info.rss) / (1024 * 1024)
+    except ImportError:
+        return None
+
+
+def load_backend(stub):
+    """Return (detector, analyze, conf, backend_name)"""
+    if stub:
+        return StubFaceDetector(), stub_analyze_emotions, 0.5, 'stub'
+
+    import emotion_tracking
+    if not (emotion_tracking.CV2_AVAILABLE and emotion_tracking.YOLO_AVAILABLE
+            and emotion_tracking.DEEPFACE_AVAILABLE):
+        print("❌ Real backend needs opencv, ultralytics and deepface; use --stub instead")
+        sys.exit(2)
+    model = emotion_tracking.YOLO(emotion_tracking.YOLO_MODEL_PATH)
+    return model, emotion_tracking.analyze_emotions, emotion_tracking.CONFIDENCE_THRESHOLD, 'yolo+deepface'
+
+
+def run_benchmark(stub=True, iterations=50, warmup=5, resolutions=RESOLUTIONS,
+                  face_counts=FACE_COUNTS, seed=0):
+    detector, analyze, conf, backend = load_backend(stub)
+
+    scenarios = {}
+    for name, frame, boxes in make_frame_set(resolutions, face_counts, seed=seed):
+        if isinstance(detector, StubFaceDetector):
+            detector.register(frame, boxes)
+            known_boxes = None
+        else:
+            # A real detector finds no faces in the synthetic blobs; crop and
+            # analyze the drawn faces so those stages are measured on real input
+            known_boxes = boxes
+
+        for _ in range(warmup):
+            run_frame(detector, analyze, frame, conf, known_boxes)
+
+        samples = {stage: [] for stage in STAGES}
+        detected = set()
+        wall_start = time.perf_counter()
+        for _ in range(iterations):
+            timings, faces_detected = run_frame(detector, analyze, frame, conf, known_boxes)
+            detected.add(faces_detected)
+            for stage, seconds in timings.items():
+                samples[stage].append(seconds)
+        wall = time.perf_counter() - wall_start
+
+        scenarios[name] = {
+            'resolution': [frame.shape[1], frame.shape[0]],
+            'faces': len(boxes),
+            'faces_detected': sorted(detected),
+            'crop_boxes': 'detected' if known_boxes is None else 'synthetic',
+            'iterations': iterations,
+            'throughput_fps': iterations / wall if wall > 0 else 0.0,
+            'stages': {stage: summarize(values) for stage, values in samples.items()},
+        }
+        print(f"  {name:<22} total p50 {scenarios[name]['stages']['total']['p50_ms']:8.2f} ms"
+              f"  {scenarios[name]['throughput_fps']:8.1f} fps"
+              f"  faces {len(boxes)} (detected {'/'.join(map(str, sorted(detected)))})")
+
+    return {
+        'backend': backend,
+        'timestamp': datetime.now().isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'peak_rss_mb': peak_rss_mb(),
+        'scenarios': scenarios,
+    }
+
+
+def compare(results, baseline, tolerance):
+    """Return a list of regression messages where p50 grew beyond tolerance"""
+    regressions = []
+    for name, scenario in results['scenarios'].items():
+        base = baseline.get('scenarios', {}).get(name)
+        if not base:
+            continue
+        for stage in STAGES:
+            current = scenario['stages'][stage]['p50_ms']
+            previous = base['stages'].get(stage, {}).get('p50_ms')
+            if not previous:
+                continue
+            ratio = current / previous
+            if ratio > 1 + tolerance:
+                regressions.append(f"{name} {stage}: p50 {previous:.2f} -> {current:.2f} ms ({ratio:.2f}x)")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the detection and emotion pipeline")
+    parser.add_argument('--stub', action='store_true', help="Use the stub detector/analyzer (no models needed)")
+    parser.add_argument('--iterations', type=int, default=50, help="Measured frames per scenario")
+    parser.add_argument('--warmup', type=int, default=5, help="Unmeasured frames per scenario")
+    parser.add_argument('--seed', type=int, default=0, help="Seed for synthetic frames")
+    parser.add_argument('--output', default=os.path.join(BENCH_DIR, 'results.json'), help="Where to write results")
+    parser.add_argument('--baseline', help="Baseline JSON to compare against")
+    parser.add_argument('--tolerance', type=float, default=0.2, help="Allowed p50 slowdown vs baseline (0.2 = 20%%)")
+    parser.add_argument('--save-baseline', help="Also write results to this baseline path")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("📊 EMOTION PIPELINE BENCHMARK")
+    print("=" * 60)
+
+    results = run_benchmark(stub=args.stub, iterations=args.iterations,
+                            warmup=args.warmup, seed=args.seed)
+    print(f"Peak RSS: {results['peak_rss_mb']} MB")
+
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"✅ Results written to {args.output}")
+
+    if args.save_baseline:
+        with open(args.save_baseline, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"✅ Baseline saved to {args.save_baseline}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get('backend') != results['backend']:
+            print(f"⚠️  Baseline backend {baseline.get('backend')} differs from {results['backend']}")
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print("❌ Regressions against baseline:")
+            for line in regressions:
+                print(f"   {line}")
+            sys.exit(1)
+        print("✅ No regressions against baseline")
+
+
+if __name__ == "__main__":
+    main()
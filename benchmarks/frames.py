@@ -0,0 +1,53 @@
+"""
+Synthetic frame generation for the pipeline benchmarks.
+Frames are deterministic for a given seed so runs are comparable.
+"""
+
+import numpy as np
+
+# (width, height) pairs exercised by default
+RESOLUTIONS = [(640, 480), (1280, 720)]
+FACE_COUNTS = [0, 1, 4, 8]
+
+
+def make_frame(width, height, num_faces, seed=0):
+    """Create a BGR frame with num_faces face-like blobs.
+
+    Returns (frame, boxes) where boxes is a list of [x1, y1, x2, y2]
+    describing where the blobs were drawn.
+    """
+    rng = np.random.default_rng(seed)
+    frame = rng.integers(40, 90, size=(height, width, 3), dtype=np.uint8)
+
+    boxes = []
+    if num_faces == 0:
+        return frame, boxes
+
+    # Lay faces out on a grid so they never overlap
+    cols = int(np.ceil(np.sqrt(num_faces)))
+    rows = int(np.ceil(num_faces / cols))
+    cell_w = width // cols
+    cell_h = height // rows
+    size = int(min(cell_w, cell_h) * 0.6)
+
+    yy, xx = np.mgrid[0:size, 0:size]
+    center = (size - 1) / 2.0
+    mask = ((xx - center) ** 2 / (center * 0.8) ** 2 + (yy - center) ** 2 / center ** 2) <= 1.0
+
+    for i in range(num_faces):
+        row, col = divmod(i, cols)
+        x1 = col * cell_w + (cell_w - size) // 2
+        y1 = row * cell_h + (cell_h - size) // 2
+        region = frame[y1:y1 + size, x1:x1 + size]
+        region[mask] = rng.integers(150, 220, size=3, dtype=np.uint8)
+        boxes.append([x1, y1, x1 + size, y1 + size])
+
+    return frame, boxes
+
+
+def make_frame_set(resolutions=RESOLUTIONS, face_counts=FACE_COUNTS, seed=0):
+    """Yield (name, frame, boxes) for every resolution/face-count combination"""
+    for width, height in resolutions:
+        for num_faces in face_counts:
+            frame, boxes = make_frame(width, height, num_faces, seed=seed)
+            yield f"{width}x{height}_faces{num_faces}", frame, boxes
@@ -0,0 +1,476 @@
+#!/usr/bin/env python3
+"""
+Socket.IO load generator for emotion_server/server.py
+
+Spawns simulated employee and HR clients, replays join_room, video_frame,
+emotion_update, hr_emotion_frame and get_room_stats traffic at fixed rates,
+and reports end-to-end latency percentiles, dropped messages and server
+CPU/memory.
+
+Examples:
+    # Start a local stub-inference server and drive 50 employees + 5 HR
+    python benchmarks/load_test.py --spawn-server --employees 50 --hr 5 --duration 30
+
+    # Drive an already running server
+    python benchmarks/load_test.py --url http://192.168.1.10:5000 --server-pid 1234
+"""
+
+import argparse
+import base64
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict, deque
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+SERVER_DIR = os.path.join(BENCH_DIR, '..', 'emotion_server')
+sys.path.insert(0, BENCH_DIR)
+
+from bench_pipeline import percentile
+
+try:
+    import socketio
+except ImportError:
+    print("❌ python-socketio is required: pip install -r emotion_server/requirements.txt")
+    sys.exit(1)
+
+try:
+    import psutil
+    PSUTIL_AVAILABLE = True
+except ImportError:
+    PSUTIL_AVAILABLE = False
+    psutil = None
+
+SAMPLE_EMOTIONS = {'angry': 2.0, 'disgust': 0.5, 'fear': 1.5, 'happy': 70.0,
+                   'sad': 3.0, 'surprise': 8.0, 'neutral': 15.0}
+
+
+def make_sample_jpeg(width, height, faces=1):
+    """Encode a synthetic frame as a data URL like the browser clients send"""
+    from frames import make_frame
+    frame, _ = make_frame(width, height, faces)
+    try:
+        import cv2
+        ok, encoded = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, 80])
+        jpeg = encoded.tobytes()
+    except ImportError:
+        from io import BytesIO
+        from PIL import Image
+        buffer = BytesIO()
+        Image.fromarray(frame[:, :, ::-1]).save(buffer, format='JPEG', quality=80)
+        jpeg = buffer.getvalue()
+    return 'data:image/jpeg;base64,' + base64.b64encode(jpeg).decode('ascii')
+
+
+class Stats:
+    """Thread-safe latency and counter collection"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.sent = defaultdict(int)
+        self.received = defaultdict(int)
+        self.errors = defaultdict(int)
+
+    def record_sent(self, kind, count=1):
+        with self.lock:
+            self.sent[kind] += count
+
+    def record_latency(self, kind, seconds):
+        with self.lock:
+            self.latencies[kind].append(seconds)
+            self.received[kind] += 1
+
+    def record_error(self, kind):
+        with self.lock:
+            self.errors[kind] += 1
+
+    def report(self):
+        with self.lock:
+            report = {}
+            for kind in sorted(set(self.sent) | set(self.received)):
+                values = sorted(self.latencies[kind])
+                report[kind] = {
+                    'sent': self.sent[kind],
+                    'received': self.received[kind],
+                    'dropped': max(0, self.sent[kind] - self.received[kind]),
+                    'p50_ms': percentile(values, 50) * 1000,
+                    'p90_ms': percentile(values, 90) * 1000,
+                    'p99_ms': percentile(values, 99) * 1000,
+                    'max_ms': (values[-1] * 1000) if values else 0.0,
+                }
+            report['errors'] = dict(self.errors)
+            return report
+
+
+class SimulatedClient:
+    """One employee or HR Socket.IO connection"""
+
+    def __init__(self, url, room_id, user_type, index, stats, args, frame_data):
+        self.url = url
+        self.room_id = room_id
+        self.user_type = user_type
+        self.name = f"load-{user_type}-{index}"
+        self.stats = stats
+        self.args = args
+        self.frame_data = frame_data
+        self.sio = socketio.Client(reconnection=False)
+        self.pending_frames = {}
+        self.pending_stats = deque()
+        self.frame_seq = 0
+        self.joined = threading.Event()
+        self.thread = None
+        self._register_handlers()
+
+    def _register_handlers(self):
+        sio = self.sio
+
+        @sio.on('room_status')
+        def on_room_status(data):
+            self.joined.set()
+
+        @sio.on('server_emotion_result')
+        def on_server_result(data):
+            self._complete_frame('video_frame', data)
+
+        @sio.on('hr_emotion_result')
+        def on_hr_result(data):
+            self._complete_frame('hr_emotion_frame', data)
+
+        @sio.on('room_stats')
+        def on_room_stats(data):
+            try:
+                sent_at = self.pending_stats.popleft()
+            except IndexError:
+                return
+            self.stats.record_latency('get_room_stats', time.perf_counter() - sent_at)
+
+        @sio.on('emotion_update')
+        def on_emotion_update(data):
+            # Employees also receive room broadcasts; only HR is measured
+            if self.user_type != 'hr':
+                return
+            sent_at = EMOTION_SENT.pop(data.get('client_id'))
+            if sent_at is not None:
+                self.stats.record_latency('emotion_update', time.perf_counter() - sent_at)
+
+        @sio.on('emotion_batch')
+        def on_emotion_batch(data):
+            # One entry per employee per server tick; coalesced updates count
+            # from the oldest one this receiver had not seen yet
+            now = time.perf_counter()
+            for entry in data.get('updates', []):
+                sent_at = EMOTION_SENT.pop_all(entry.get('client_id'))
+                if sent_at is not None:
+                    self.stats.record_latency('emotion_update', now - sent_at)
+
+        @sio.on('error')
+        def on_error(data):
+            self.stats.record_error(data.get('message', 'error'))
+
+    def _complete_frame(self, kind, data):
+        sent_at = self.pending_frames.pop(data.get('frame_id'), None)
+        if sent_at is not None:
+            self.stats.record_latency(kind, time.perf_counter() - sent_at)
+
+    def connect(self):
+        self.sio.connect(self.url, transports=['websocket'])
+        self.sio.emit('join_room', {
+            'room_id': self.room_id,
+            'user_type': self.user_type,
+            'user_name': self.name
+        })
+        self.stats.record_sent('join_room')
+        start = time.perf_counter()
+        if self.joined.wait(timeout=10):
+            self.stats.record_latency('join_room', time.perf_counter() - start)
+
+    def _send_frame(self, event, extra):
+        self.frame_seq += 1
+        frame_id = f"{self.name}-{self.frame_seq}"
+        self.pending_frames[frame_id] = time.perf_counter()
+        payload = {'frame': self.frame_data, 'frame_id': frame_id}
+        payload.update(extra)
+        self.sio.emit(event, payload)
+        self.stats.record_sent(event)
+
+    def run(self, stop_event):
+        args = self.args
+        schedule = []
+        if self.user_type == 'employee':
+            if args.frame_rate > 0:
+                schedule.append([1.0 / args.frame_rate, 'video_frame'])
+            if args.update_rate > 0:
+                schedule.append([1.0 / args.update_rate, 'emotion_update'])
+        else:
+            if args.hr_frame_rate > 0:
+                schedule.append([1.0 / args.hr_frame_rate, 'hr_emotion_frame'])
+            if args.stats_interval > 0:
+                schedule.append([args.stats_interval, 'get_room_stats'])
+
+        now = time.perf_counter()
+        # Stagger start times so clients do not fire in lockstep
+        offset = (hash(self.name) % 1000) / 1000.0
+        next_due = [now + interval * offset for interval, _ in schedule]
+
+        while not stop_event.is_set() and schedule:
+            idx = min(range(len(schedule)), key=lambda i: next_due[i])
+            delay = next_due[idx] - time.perf_counter()
+            if delay > 0 and stop_event.wait(delay):
+                break
+            interval, event = schedule[idx]
+            next_due[idx] += interval
+            try:
+                self._emit_event(event)
+            except Exception:
+                self.stats.record_error(event)
+
+    def _emit_event(self, event):
+        if event == 'video_frame':
+            if self.args.process_server:
+                self._send_frame('video_frame', {'process_server': True})
+            else:
+                # Relay-only traffic: no result comes back to measure
+                self.sio.emit('video_frame', {'frame': self.frame_data, 'process_server': False})
+        elif event == 'hr_emotion_frame':
+            self._send_frame('hr_emotion_frame', {'frame_count': self.frame_seq})
+        elif event == 'emotion_update':
+            EMOTION_SENT.push(self.sio.get_sid(), time.perf_counter(), self.args.hr_per_room)
+            self.sio.emit('emotion_update', {
+                'emotions': SAMPLE_EMOTIONS,
+                'dominant_emotion': 'happy',
+                'face_detected': True
+            })
+            self.stats.record_sent('emotion_update', self.args.hr_per_room)
+        elif event == 'get_room_stats':
+            self.pending_stats.append(time.perf_counter())
+            self.sio.emit('get_room_stats')
+            self.stats.record_sent('get_room_stats')
+
+    def start(self, stop_event):
+        self.thread = threading.Thread(target=self.run, args=(stop_event,), daemon=True)
+        self.thread.start()
+
+    def close(self):
+        try:
+            self.sio.disconnect()
+        except Exception:
+            pass
+
+
+class _EmotionSendTimes:
+    """Send timestamps of emotion_update per employee sid.
+
+    Each update fans out to every HR client in the room, so a timestamp is
+    kept until all expected receivers have consumed it.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.pending = defaultdict(deque)  # sid -> deque([sent_at, remaining])
+
+    def push(self, sid, sent_at, receivers):
+        if receivers <= 0:
+            return
+        with self.lock:
+            self.pending[sid].append([sent_at, receivers])
+
+    def pop(self, sid):
+        with self.lock:
+            queue = self.pending.get(sid)
+            if not queue:
+                return None
+            entry = queue[0]
+            entry[1] -= 1
+            if entry[1] <= 0:
+                queue.popleft()
+            return entry[0]
+
+    def pop_all(self, sid):
+        """Consume every pending timestamp of sid for one receiver; returns the oldest"""
+        with self.lock:
+            queue = self.pending.get(sid)
+            if not queue:
+                return None
+            oldest = queue[0][0]
+            for entry in queue:
+                entry[1] -= 1
+            while queue and queue[0][1] <= 0:
+                queue.popleft()
+            return oldest
+
+
+EMOTION_SENT = _EmotionSendTimes()
+
+
+class ResourceSampler:
+    """Samples CPU and RSS of the server process"""
+
+    def __init__(self, pid, interval=1.0):
+        self.process = psutil.Process(pid) if (PSUTIL_AVAILABLE and pid) else None
+        self.interval = interval
+        self.cpu = []
+        self.rss_mb = []
+        self.thread = None
+
+    def start(self, stop_event):
+        if not self.process:
+            return
+        self.process.cpu_percent(None)
+
+        def sample():
+            while not stop_event.wait(self.interval):
+                try:
+                    self.cpu.append(self.process.cpu_percent(None))
+                    self.rss_mb.append(self.process.memory_info().rss / (1024 * 1024))
+                except psutil.Error:
+                    break
+
+        self.thread = threading.Thread(target=sample, daemon=True)
+        self.thread.start()
+
+    def report(self):
+        if not self.cpu:
+            return None
+        return {
+            'cpu_percent_mean': sum(self.cpu) / len(self.cpu),
+            'cpu_percent_max': max(self.cpu),
+            'rss_mb_max': max(self.rss_mb),
+            'rss_mb_last': self.rss_mb[-1],
+        }
+
+
+def spawn_server(port, state_dir):
+    # Snapshots go to state_dir, so runs neither restore each other's rooms
+    # nor write emotion_state.snapshot into the source tree
+    env = dict(os.environ, EMOTION_STUB_INFERENCE='1', EMOTION_SERVER_PORT=str(port),
+               EMOTION_SNAPSHOT_PATH=os.path.join(state_dir, 'emotion_state.snapshot'))
+    process = subprocess.Popen([sys.executable, 'server.py'], cwd=SERVER_DIR, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return process
+
+
+def wait_for_server(url, timeout=60):
+    import urllib.request
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with urllib.request.urlopen(f"{url}/api/status", timeout=2):
+                return True
+        except Exception:
+            time.sleep(0.5)
+    return False
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Socket.IO load test for the Emotion HR server")
+    parser.add_argument('--url', default='http://127.0.0.1:5000', help="Server base URL")
+    parser.add_argument('--spawn-server', action='store_true', help="Start a local stub-inference server")
+    parser.add_argument('--server-pid', type=int, help="PID of the server to sample CPU/memory from")
+    parser.add_argument('--rooms', type=int, default=1, help="Number of rooms")
+    parser.add_argument('--employees', type=int, default=10, help="Employees per room")
+    parser.add_argument('--hr', dest='hr_per_room', type=int, default=1, help="HR clients per room")
+    parser.add_argument('--frame-rate', type=float, default=2.0, help="video_frame per employee per second")
+    parser.add_argument('--update-rate', type=float, default=1.0, help="emotion_update per employee per second")
+    parser.add_argument('--hr-frame-rate', type=float, default=2.0, help="hr_emotion_frame per HR per second")
+    parser.add_argument('--stats-interval', type=float, default=5.0, help="Seconds between get_room_stats per HR")
+    parser.add_argument('--no-process-server', dest='process_server', action='store_false',
+                        help="Send video_frame without requesting server-side analysis")
+    parser.add_argument('--resolution', default='640x480', help="Sample JPEG size, e.g. 1280x720")
+    parser.add_argument('--faces', type=int, default=1, help="Faces drawn in the sample JPEG")
+    parser.add_argument('--duration', type=float, default=30.0, help="Seconds of traffic")
+    parser.add_argument('--drain', type=float, default=5.0, help="Seconds to wait for late results")
+    parser.add_argument('--output', help="Write the JSON report here")
+    args = parser.parse_args()
+
+    server_process = None
+    server_pid = args.server_pid
+    if args.spawn_server:
+        port = int(args.url.rsplit(':', 1)[-1].split('/')[0])
+        state_dir = tempfile.mkdtemp(prefix='emotion-load-test-')
+        server_process = spawn_server(port, state_dir)
+        server_pid = server_process.pid
+        if not wait_for_server(args.url):
+            server_process.terminate()
+            shutil.rmtree(state_dir, ignore_errors=True)
+            print("❌ Spawned server did not come up")
+            sys.exit(1)
+
+    width, height = (int(v) for v in args.resolution.split('x'))
+    frame_data = make_sample_jpeg(width, height, args.faces)
+
+    print("=" * 60)
+    print("🔥 EMOTION SERVER LOAD TEST")
+    print("=" * 60)
+    print(f"Rooms: {args.rooms}  Employees/room: {args.employees}  HR/room: {args.hr_per_room}")
+    print(f"Frame: {args.resolution} ({len(frame_data) // 1024} KB base64)")
+
+    stats = Stats()
+    stop_event = threading.Event()
+    clients = []
+    try:
+        for room in range(args.rooms):
+            room_id = f"load-room-{room}"
+            for i in range(args.hr_per_room):
+                clients.append(SimulatedClient(args.url, room_id, 'hr', f"{room}-{i}", stats, args, frame_data))
+            for i in range(args.employees):
+                clients.append(SimulatedClient(args.url, room_id, 'employee', f"{room}-{i}", stats, args, frame_data))
+
+        # HR clients connect first so they see every employee update
+        for client in clients:
+            client.connect()
+        print(f"✅ {len(clients)} clients connected")
+
+        sampler = ResourceSampler(server_pid)
+        sampler.start(stop_event)
+        for client in clients:
+            client.start(stop_event)
+
+        time.sleep(args.duration)
+        stop_event.set()
+        time.sleep(args.drain)
+
+        report = {
+            'config': {k: v for k, v in vars(args).items() if k != 'output'},
+            'clients': len(clients),
+            'events': stats.report(),
+            'server': sampler.report(),
+        }
+    finally:
+        stop_event.set()
+        for client in clients:
+            client.close()
+        if server_process:
+            server_process.terminate()
+            server_process.wait(timeout=10)
+            shutil.rmtree(state_dir, ignore_errors=True)
+
+    print("-" * 60)
+    print(f"{'event':<18}{'sent':>8}{'recv':>8}{'drop':>7}{'p50 ms':>10}{'p99 ms':>10}")
+    for kind, row in report['events'].items():
+        if kind == 'errors':
+            continue
+        print(f"{kind:<18}{row['sent']:>8}{row['received']:>8}{row['dropped']:>7}"
+              f"{row['p50_ms']:>10.1f}{row['p99_ms']:>10.1f}")
+    if report['events']['errors']:
+        print(f"Errors: {report['events']['errors']}")
+    if report['server']:
+        server = report['server']
+        print(f"Server CPU: mean {server['cpu_percent_mean']:.0f}%  max {server['cpu_percent_max']:.0f}%"
+              f"  RSS max {server['rss_mb_max']:.0f} MB")
+    elif not PSUTIL_AVAILABLE:
+        print("⚠️  Install psutil to sample server CPU/memory")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"✅ Report written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+"""
+Streaming sliding-window alerting on employee emotions.
+Each employee keeps a time-weighted window of dominant emotions (how long
+each emotion was dominant over the last window_seconds) and an exponential
+moving average of the scores. Both are updated in O(1) amortized time per
+emotion_update; old segments are evicted from the front of a deque, never
+by rescanning history. Rules are checked on every update and fire once
+when their condition becomes true (subject to a per-rule cooldown).
+
+Rule dicts (config.ALERT_RULES):
+    name          alert id sent to HR
+    emotions      emotions the rule sums over
+    min_fraction  fire when these emotions were dominant for at least this
+                  share of the observed window ...
+    min_coverage  ... and the window is at least this full (0-1)
+    min_ema       fire when the summed EMA score (percent) reaches this
+"""
+
+import math
+import threading
+from collections import OrderedDict, deque
+
+import metrics
+from codec import EMOTION_ORDER, UNKNOWN_EMOTION, emotion_index
+
+ALERTS_FIRED = metrics.registry.counter(
+    'emotion_alerts_total',
+    'hr_alert events fired, by rule',
+    ('rule',))
+
+
+class EmployeeWindow:
+    """Sliding-window emotion statistics for one employee"""
+
+    __slots__ = ('segments', 'durations', 'covered', 'ema', 'last_time', 'last_dominant',
+                 'active', 'last_fired')
+
+    def __init__(self):
+        self.segments = deque()  # [start, end, emotion_idx]
+        self.durations = [0.0] * len(EMOTION_ORDER)
+        self.covered = 0.0
+        self.ema = None
+        self.last_time = None
+        self.last_dominant = None
+        self.active = set()  # Rules whose condition currently holds
+        self.last_fired = {}  # rule name -> time
+
+    def add(self, now, emotions, dominant, window, ema_seconds, max_gap):
+        # Credit the previous dominant emotion up to now (a long gap means the
+        # employee was away, so only max_gap of it counts)
+        if self.last_time is not None and self.last_dominant is not None:
+            start = max(self.last_time, now - max_gap)
+            if now > start:
+                self.segments.append([start, now, self.last_dominant])
+                self.durations[self.last_dominant] += now - start
+                self.covered += now - start
+        self._evict(now - window)
+
+        if emotions:
+            scores = [float(emotions.get(name, 0.0)) for name in EMOTION_ORDER]
+            if self.ema is None:
+                self.ema = scores
+            else:
+                dt = now - self.last_time
+                alpha = 1.0 - math.exp(-dt / ema_seconds) if ema_seconds > 0 else 1.0
+                self.ema = [old + alpha * (new - old) for old, new in zip(self.ema, scores)]
+
+        self.last_time = now
+        self.last_dominant = dominant
+
+    def _evict(self, cutoff):
+        segments = self.segments
+        while segments and segments[0][1] <= cutoff:
+            start, end, emotion = segments.popleft()
+            self.durations[emotion] -= end - start
+            self.covered -= end - start
+        if segments and segments[0][0] < cutoff:
+            # Trim the segment that straddles the window edge
+            first = segments[0]
+            self.durations[first[2]] -= cutoff - first[0]
+            self.covered -= cutoff - first[0]
+            first[0] = cutoff
+
+    def fraction(self, indices):
+        if self.covered <= 0:
+            return 0.0
+        return sum(self.durations[i] for i in indices) / self.covered
+
+    def ema_score(self, indices):
+        if self.ema is None:
+            return 0.0
+        return sum(self.ema[i] for i in indices)
+
+
+class AlertEngine:
+    """Per-employee windows plus rule evaluation on each update"""
+
+    def __init__(self, rules, window_seconds=600, ema_seconds=60, cooldown=300, max_gap=30,
+                 max_idle=3600):
+        self.rules = [dict(rule, indices=[emotion_index(e) for e in rule['emotions']]) for rule in rules]
+        self.window = window_seconds
+        self.ema_seconds = ema_seconds
+        self.cooldown = cooldown
+        self.max_gap = max_gap
+        self.max_idle = max_idle
+        self._windows = OrderedDict()  # client_id -> EmployeeWindow, least recently updated first
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._windows)
+
+    def update(self, client_id, now, emotions, dominant, face_detected=True):
+        """Record one emotion_update; returns the list of alerts that fired"""
+        # Time without a face (or with an unknown label) is not credited to any emotion
+        index = emotion_index(dominant) if face_detected else None
+        if index == UNKNOWN_EMOTION:
+            index = None
+
+        with self._lock:
+            state = self._windows.pop(client_id, None) or EmployeeWindow()
+            self._expire(now)
+            self._windows[client_id] = state
+            state.add(now, emotions if face_detected else None, index,
+                      self.window, self.ema_seconds, self.max_gap)
+            return self._evaluate(state, now)
+
+    def _evaluate(self, state, now):
+        fired = []
+        coverage = state.covered / self.window if self.window else 0.0
+        for rule in self.rules:
+            name = rule['name']
+            holds = True
+            fraction = state.fraction(rule['indices'])
+            ema = state.ema_score(rule['indices'])
+            if 'min_fraction' in rule:
+                holds = fraction >= rule['min_fraction'] and coverage >= rule.get('min_coverage', 0.0)
+            if holds and 'min_ema' in rule:
+                holds = ema >= rule['min_ema']
+
+            if not holds:
+                state.active.discard(name)
+                continue
+            if name in state.active:
+                continue  # Already reported; re-arms once the condition clears
+            state.active.add(name)
+            last = state.last_fired.get(name)
+            if last is not None and now - last < self.cooldown:
+                continue
+            state.last_fired[name] = now
+            ALERTS_FIRED.inc(name)
+            label = '/'.join(rule['emotions'])
+            if 'min_fraction' in rule:
+                message = f"{label} for {fraction:.0%} of the last {self.window / 60:.0f} min"
+            else:
+                message = f"{label} averaging {ema:.0f}%"
+            fired.append({
+                'message': message,
+                'rule': name,
+                'emotions': list(rule['emotions']),
+                'fraction': round(fraction, 3),
+                'ema': round(ema, 1),
+                'coverage': round(min(coverage, 1.0), 3),
+                'window_seconds': self.window
+            })
+        return fired
+
+    def _expire(self, now):
+        """Drop employees with no update for max_idle seconds (oldest first, no full scan)"""
+        while self._windows:
+            client_id, state = next(iter(self._windows.items()))
+            if now - state.last_time <= self.max_idle:
+                break
+            del self._windows[client_id]
+
+    def rename(self, old_client_id, new_client_id):
+        with self._lock:
+            state = self._windows.pop(old_client_id, None)
+            if state is not None:
+                self._windows[new_client_id] = state
+
+    def forget(self, client_id):
+        with self._lock:
+            self._windows.pop(client_id, None)
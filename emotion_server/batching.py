@@ -0,0 +1,134 @@
+"""
+Cross-client dynamic batching for server inference.
+Handler threads submit frames or face crops and block on a Future; a single
+worker per scheduler groups pending items from every client into one batch
+and dispatches it when the batch is full or the oldest item has waited
+max_wait seconds. Each result is routed back to the Future of the item
+that produced it, so the submitting handler emits to its own client.
+"""
+
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+import metrics
+
+BATCH_SIZE = metrics.registry.histogram(
+    'emotion_batch_size',
+    'Items per dispatched inference batch',
+    ('scheduler',),
+    buckets=(1, 2, 4, 8, 16, 32, 64))
+
+BATCH_QUEUE_WAIT = metrics.registry.histogram(
+    'emotion_batch_queue_wait_seconds',
+    'Time items wait in a batching queue before dispatch',
+    ('scheduler',))
+
+BATCH_LATENCY = metrics.registry.histogram(
+    'emotion_batch_process_seconds',
+    'Time to run one inference batch',
+    ('scheduler',))
+
+BATCHES_DISPATCHED = metrics.registry.counter(
+    'emotion_batches_dispatched_total',
+    'Batches dispatched, by trigger (size limit or deadline)',
+    ('scheduler', 'trigger'))
+
+
+class _Item:
+    __slots__ = ('payload', 'size', 'future', 'enqueued_at')
+
+    def __init__(self, payload, size=1):
+        self.payload = payload
+        self.size = size
+        self.future = Future()
+        self.enqueued_at = time.perf_counter()
+
+
+class BatchScheduler:
+    """Groups submitted items into batches for process_batch(list) -> list
+
+    max_batch_size counts items, or the sum of item_size(payload) when given
+    (e.g. faces when each item is one frame's crops).
+    """
+
+    def __init__(self, name, process_batch, max_batch_size=16, max_wait=0.02, item_size=None):
+        self.name = name
+        self.process_batch = process_batch
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait))
+        self.item_size = item_size or (lambda payload: 1)
+        self._queued = 0  # Total size of queued items
+        self._queue = deque()
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name=f'batch-{name}', daemon=True)
+        self._thread.start()
+        metrics.register_queue_depth(f'batch_{name}', self.depth)
+
+    def depth(self):
+        return len(self._queue)
+
+    def submit_many(self, payloads):
+        """Queue several items at once; returns one Future per item"""
+        items = [_Item(payload, self.item_size(payload)) for payload in payloads]
+        if items:
+            with self._cond:
+                self._queue.extend(items)
+                self._queued += sum(item.size for item in items)
+                self._cond.notify()
+        return [item.future for item in items]
+
+    def submit(self, payload):
+        return self.submit_many([payload])[0]
+
+    def map(self, payloads, timeout=None):
+        """Submit items and block until all of their results are ready"""
+        return [future.result(timeout) for future in self.submit_many(payloads)]
+
+    def _next_batch(self):
+        with self._cond:
+            while not self._queue:
+                self._cond.wait()
+
+            # Wait for more items until the batch is full or the oldest item is due
+            deadline = self._queue[0].enqueued_at + self.max_wait
+            while self._queued < self.max_batch_size:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+
+            # Always take at least one item, even if it alone exceeds the limit
+            batch, total = [], 0
+            while self._queue and (not batch or total + self._queue[0].size <= self.max_batch_size):
+                item = self._queue.popleft()
+                batch.append(item)
+                total += item.size
+            self._queued -= total
+
+        trigger = 'size' if total >= self.max_batch_size else 'deadline'
+        return batch, total, trigger
+
+    def _run(self):
+        while True:
+            batch, total, trigger = self._next_batch()
+            now = time.perf_counter()
+            for item in batch:
+                BATCH_QUEUE_WAIT.observe(now - item.enqueued_at, self.name)
+            BATCH_SIZE.observe(total, self.name)
+            BATCHES_DISPATCHED.inc(self.name, trigger)
+
+            try:
+                with BATCH_LATENCY.time(self.name):
+                    results = self.process_batch([item.payload for item in batch])
+                if len(results) != len(batch):
+                    raise RuntimeError(f"{self.name} batch returned {len(results)} results for {len(batch)} items")
+            except Exception as e:
+                print(f"Batch scheduler {self.name} error: {e}")
+                for item in batch:
+                    item.future.set_exception(e)
+                continue
+
+            for item, result in zip(batch, results):
+                item.future.set_result(result)
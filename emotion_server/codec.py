@@ -0,0 +1,130 @@
+"""
+Compact MessagePack encoding for emotion events.
+Clients that join with encoding='msgpack' receive emotion_update,
+server_emotion_result and room_status as binary messages; everyone else
+keeps the JSON dicts. Emotion scores are sent in EMOTION_ORDER as uint8
+(0-255 for 0-100 %), timestamps as epoch milliseconds and client ids as
+small per-room integers.
+
+Emotion entry:  [client_idx, ts_ms, dominant_idx, face_detected, scores]
+Update message: {'e': [entry, ...], 'c': {client_idx: [client_id, user_name]}}
+                ('c' only lists clients the receiver has not been told about)
+Face result:    {'i': frame_id, 'f': [[x1, y1, x2, y2, track_id, dominant_idx, scores], ...]}
+"""
+
+import itertools
+import threading
+from datetime import datetime
+
+try:
+    import msgpack
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    msgpack = None
+    MSGPACK_AVAILABLE = False
+
+ENCODINGS = ('json', 'msgpack')
+EMOTION_ORDER = ('angry', 'disgust', 'fear', 'happy', 'sad', 'surprise', 'neutral')
+UNKNOWN_EMOTION = 255
+_EMOTION_INDEX = {name: i for i, name in enumerate(EMOTION_ORDER)}
+
+
+def quantize_scores(emotions):
+    """Percent scores dict -> 7 bytes in EMOTION_ORDER"""
+    emotions = emotions or {}
+    return bytes(min(255, max(0, int(round(float(emotions.get(name, 0.0)) * 2.55))))
+                 for name in EMOTION_ORDER)
+
+
+def dequantize_scores(scores):
+    return {name: round(value / 2.55, 1) for name, value in zip(EMOTION_ORDER, scores)}
+
+
+def emotion_index(name):
+    return _EMOTION_INDEX.get(name, UNKNOWN_EMOTION)
+
+
+def epoch_ms(timestamp):
+    """ISO timestamp string (as stored in emotion_data) -> epoch milliseconds"""
+    return int(datetime.fromisoformat(timestamp).timestamp() * 1000)
+
+
+class ClientInterner:
+    """Per-room mapping of Socket.IO client ids to small integers.
+
+    Indices are never reused, in any room, so a receiver can keep merging
+    tables: an index it already knows always means the same client.
+    """
+
+    _indices = itertools.count()  # Shared by every room
+
+    def __init__(self):
+        self.ids = {}  # client_id -> index
+        self.names = {}  # index -> [client_id, user_name]
+        # Used by the fan-out thread and the Socket.IO handler threads
+        self._lock = threading.Lock()
+
+    def intern(self, client_id, user_name):
+        """Return (index, is_new)"""
+        with self._lock:
+            index = self.ids.get(client_id)
+            if index is not None:
+                return index, False
+            index = next(self._indices)
+            self.ids[client_id] = index
+            self.names[index] = [client_id, user_name]
+            return index, True
+
+    def forget(self, client_id):
+        """Drop a client that left, so room_status stops shipping it"""
+        with self._lock:
+            index = self.ids.pop(client_id, None)
+            if index is not None:
+                del self.names[index]
+
+    def table(self):
+        with self._lock:
+            return dict(self.names)
+
+
+def pack_entry(entry, interner, new_clients):
+    index, is_new = interner.intern(entry['client_id'], entry.get('user_name'))
+    if is_new:
+        new_clients[index] = [entry['client_id'], entry.get('user_name')]
+    return [
+        index,
+        epoch_ms(entry['timestamp']),
+        emotion_index(entry.get('dominant_emotion')),
+        bool(entry.get('face_detected')),
+        quantize_scores(entry.get('emotions'))
+    ]
+
+
+def encode_updates(entries, interner):
+    """Encode emotion_data entries; new clients are announced inline"""
+    new_clients = {}
+    message = {'e': [pack_entry(entry, interner, new_clients) for entry in entries]}
+    if new_clients:
+        message['c'] = new_clients
+    return msgpack.packb(message)
+
+
+def encode_room_status(room_id, clients, history, interner):
+    """room_status with the full client table, so later updates can omit names"""
+    entries = [pack_entry(entry, interner, {}) for entry in history]
+    return msgpack.packb({'room_id': room_id, 'clients': clients, 'e': entries, 'c': interner.table()})
+
+
+def encode_faces(faces, frame_id):
+    return msgpack.packb({
+        'i': frame_id,
+        'f': [
+            [*face['bbox'], face.get('track_id', 0), emotion_index(face['dominant_emotion']),
+             quantize_scores(face['emotions'])]
+            for face in faces
+        ]
+    })
+
+
+def decode(data):
+    return msgpack.unpackb(data, strict_map_key=False)
@@ -3,24 +3,96 @@ Emotion HR Server Configuration
 Modify these settings as needed for your deployment.
 """
 
+import os
+
 # Server Configuration
 SERVER_HOST = '0.0.0.0'  # Listen on all interfaces
-SERVER_PORT = 5000
+SERVER_PORT = int(os.environ.get('EMOTION_SERVER_PORT', 5000))
 DEBUG_MODE = False
 
 # Model Configuration
 YOLO_MODEL_PATH = r"D:\\arun-pt2\\yolov8n-face.pt"  # Update this path
 CONFIDENCE_THRESHOLD = 0.5
+DETECT_IMAGE_SIZE = 640  # YOLO input size for emotion detection (passed on every call)
+# Set EMOTION_INFERENCE=0 on relay-only nodes: frames are forwarded to HR but
+# OpenCV/ultralytics/DeepFace (TensorFlow) are never imported
+INFERENCE_ENABLED = os.environ.get('EMOTION_INFERENCE', '1') != '0'
+# Replace YOLO + DeepFace with a cheap stub (load testing without models)
+STUB_INFERENCE = os.environ.get('EMOTION_STUB_INFERENCE', '0') == '1'
 
 # CORS Configuration (for distributed setup)
 ALLOWED_ORIGINS = ["*"]  # Allow all origins - you can restrict this to specific IPs
 
+# Cross-client inference batching
+BATCHING_ENABLED = True
+DETECT_BATCH_SIZE = 8  # Max frames per YOLO call
+EMOTION_BATCH_SIZE = 32  # Max face crops per emotion classifier call
+BATCH_MAX_WAIT_MS = 20  # Dispatch a partial batch once its oldest item waited this long
+
+# Inference worker processes (0 = run inference in the server process)
+INFERENCE_PROCESSES = int(os.environ.get('EMOTION_INFERENCE_PROCESSES', 0))
+FRAME_ARENA_SLOTS = 16  # Shared-memory frame slots; frames beyond this wait for a free slot
+FRAME_SLOT_MAX_SHAPE = (1080, 1920, 3)  # Largest decoded frame a slot can hold
+WORKER_TIMEOUT = 30  # Seconds to wait for a free slot or a worker result
+
+# Fair inference admission across rooms (see fairness.py). HR hr_emotion_frame
+# requests go before employee video_frames; rooms share slots by weight
+FAIR_SCHEDULING_ENABLED = True
+INFERENCE_SLOTS = 0  # Frames analyzed at once; 0 = DETECT_BATCH_SIZE per inference process
+FAIR_MAX_WAIT = 5  # Seconds a frame may wait for a slot before it is dropped
+# Per-room quotas: 'weight' (share of slots under contention), 'max_in_flight'
+# (frames of the room analyzed at once) and 'max_fps' (employee frames per
+# second for the whole room); 0 = unlimited
+ROOM_QUOTA_DEFAULT = {'weight': 1.0, 'max_in_flight': 0, 'max_fps': 0}
+ROOM_QUOTAS = {
+    # 'boardroom': {'weight': 2.0},
+    # 'call-center': {'max_in_flight': 4, 'max_fps': 20},
+}
+
+# HR fan-out: employee emotion_updates are sent to HR as one emotion_batch per
+# room every FANOUT_INTERVAL_MS (latest update per employee); 0 = emit each update
+FANOUT_INTERVAL_MS = 250
+
+# Room state snapshots, restored on startup (0 = disabled)
+SNAPSHOT_PATH = os.environ.get('EMOTION_SNAPSHOT_PATH', 'emotion_state.snapshot')
+SNAPSHOT_INTERVAL = 10  # Seconds between snapshots (only written when state changed)
+
+# HR alerts on sustained emotions (sliding window per employee, see alerts.py)
+ALERTS_ENABLED = True
+ALERT_WINDOW_SECONDS = 600  # Window for the share of time per dominant emotion
+ALERT_EMA_SECONDS = 60  # Time constant of the emotion score moving average
+ALERT_COOLDOWN = 300  # Minimum seconds between two alerts of one rule for one employee
+ALERT_RULES = [
+    {'name': 'sustained_negative', 'emotions': ('angry', 'sad'), 'min_fraction': 0.6, 'min_coverage': 0.5},
+    {'name': 'high_fear', 'emotions': ('fear',), 'min_ema': 50}
+]
+
+# CPU budget for inference (see resources.py)
+THREAD_BUDGET_ENABLED = os.environ.get('EMOTION_THREAD_BUDGET', '1') != '0'
+INFERENCE_THREADS = int(os.environ.get('EMOTION_INFERENCE_THREADS', 0))  # Threads per worker for TF/torch/OpenCV/BLAS; 0 = the worker's share of cores
+RESERVED_CORES = 1  # Cores kept free for the Socket.IO/web threads
+PIN_INFERENCE_WORKERS = os.environ.get('EMOTION_PIN_WORKERS', '0') == '1'  # Pin each worker process to its own cores (Linux only)
+
+# Face presence fast path (presence_frame events, see presence.py): detector
+# only, on a tiny frame, without emotion analysis
+PRESENCE_ENABLED = os.environ.get('EMOTION_PRESENCE', '1') != '0'
+PRESENCE_DETECTOR = os.environ.get('EMOTION_PRESENCE_DETECTOR', 'auto')  # 'auto', 'yolo' or 'cascade'
+PRESENCE_FRAME_WIDTH = 160  # Frames are downscaled to this width before detection
+PRESENCE_DETECTORS = 0  # Detector instances checking frames in parallel; 0 = one per core, at most 4
+PRESENCE_MIN_INTERVAL_MS = 250  # Per-client rate cap; faster presence frames are dropped
+PRESENCE_MAX_AGE = 10  # Seconds before an employee's presence counts as unknown
+
 # Emotion Processing
+CROP_PADDING = 10  # Pixels of context added around each detected face
+MIN_FACE_SIZE = 20  # Skip padded face crops smaller than this (pixels)
 FRAME_PROCESSING_INTERVAL = 3  # Process every Nth frame
 MAX_EMOTION_HISTORY = 100  # Keep last N emotion entries per room
 DATA_CLEANUP_INTERVAL = 300  # Clean up old data every 5 minutes (seconds)
 MAX_DATA_AGE = 86400  # Keep data for max 24 hours (seconds)
 
+# Admin API (profiling etc.); admin endpoints are disabled when empty
+ADMIN_TOKEN = os.environ.get('EMOTION_ADMIN_TOKEN', '')
+
 # WebSocket Configuration
 CORS_ALLOWED_ORIGINS = "*"  # Allow connections from any origin
 
@@ -0,0 +1,232 @@
+"""
+Fair admission of frames to inference across rooms and clients.
+Inference runs at most `slots` frames at a time. A frame that finds every
+slot busy waits in its room's queue; freed slots go to:
+
+1. the highest priority class with a waiting frame ('interactive' HR
+   requests before 'background' employee frames), then
+2. the room with the smallest virtual start tag in that class (start-time
+   weighted fair queuing: a room's tag advances by 1/weight per frame, so
+   a room with 80 employees cannot starve a room with 2). A room whose
+   queue empties keeps its last tag, so sending in bursts does not buy it
+   more than its weighted share; then
+3. the room's clients in round-robin order. Each client has at most one
+   waiting frame; a newer frame from the same client replaces it, since
+   only the latest frame matters.
+
+Per-room quotas (config.ROOM_QUOTAS) set the weight, a cap on the room's
+frames in flight and a frames-per-second budget for background frames.
+Frames over budget, frames that wait longer than max_wait and replaced
+frames raise InferenceDropped.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+import metrics
+
+PRIORITY_CLASSES = ('interactive', 'background')  # Highest priority first
+
+FAIR_QUEUE_WAIT = metrics.registry.histogram(
+    'emotion_fair_queue_wait_seconds',
+    'Time frames wait for an inference slot, by room and priority class',
+    ('room', 'class'))
+
+FAIR_ADMITTED = metrics.registry.counter(
+    'emotion_fair_admitted_total',
+    'Frames admitted to inference, by room and priority class',
+    ('room', 'class'))
+
+
+class InferenceDropped(Exception):
+    """The frame was not admitted; reason is the frames_dropped label"""
+
+    def __init__(self, reason):
+        super().__init__(reason)
+        self.reason = reason
+
+
+class _Waiter:
+    __slots__ = ('room_id', 'client_id', 'priority', 'event', 'state', 'reason', 'enqueued_at')
+
+    def __init__(self, room_id, client_id, priority):
+        self.room_id = room_id
+        self.client_id = client_id
+        self.priority = priority
+        self.event = threading.Event()
+        self.state = 'waiting'  # -> granted / dropped
+        self.reason = None
+        self.enqueued_at = time.perf_counter()
+
+
+class _Flow:
+    """Waiting frames of one room in one priority class"""
+
+    __slots__ = ('waiters', 'start')
+
+    def __init__(self, start):
+        self.waiters = OrderedDict()  # client_id -> _Waiter, round-robin order
+        self.start = start  # Virtual start tag of the head frame
+
+
+class _Room:
+    __slots__ = ('weight', 'max_in_flight', 'max_fps', 'in_flight', 'tokens', 'refilled', 'finish')
+
+    def __init__(self, quota):
+        self.weight = max(float(quota.get('weight', 1.0)), 1e-6)
+        self.max_in_flight = int(quota.get('max_in_flight', 0))  # 0 = no cap
+        self.max_fps = float(quota.get('max_fps', 0))  # 0 = no budget
+        self.in_flight = 0
+        self.tokens = max(1.0, self.max_fps)
+        self.refilled = time.monotonic()
+        # Virtual finish tag of the room's last frame per class, kept while its
+        # queue is empty; forgotten with the room once it is idle (prune)
+        self.finish = {priority: 0.0 for priority in PRIORITY_CLASSES}
+
+    def take_token(self):
+        """Token-bucket check of the room's frames-per-second budget"""
+        if self.max_fps <= 0:
+            return True
+        now = time.monotonic()
+        self.tokens = min(max(1.0, self.max_fps), self.tokens + (now - self.refilled) * self.max_fps)
+        self.refilled = now
+        if self.tokens < 1.0:
+            return False
+        self.tokens -= 1.0
+        return True
+
+    def has_capacity(self):
+        return self.max_in_flight <= 0 or self.in_flight < self.max_in_flight
+
+
+class FairScheduler:
+    """Admission gate: `with scheduler.slot(room_id, client_id, 'background'):`"""
+
+    def __init__(self, slots, max_wait=5.0, quotas=None, default_quota=None):
+        self.slots = max(1, int(slots))
+        self.max_wait = max_wait
+        self.quotas = quotas or {}
+        self.default_quota = default_quota or {}
+        self._free = self.slots
+        self._rooms = {}  # room_id -> _Room
+        self._flows = {priority: {} for priority in PRIORITY_CLASSES}  # priority -> room_id -> _Flow
+        self._virtual_time = {priority: 0.0 for priority in PRIORITY_CLASSES}
+        self._waiting = {}  # client_id -> _Waiter
+        self._lock = threading.Lock()
+
+    def _room(self, room_id):
+        room = self._rooms.get(room_id)
+        if room is None:
+            room = self._rooms[room_id] = _Room({**self.default_quota, **self.quotas.get(room_id, {})})
+        return room
+
+    @contextmanager
+    def slot(self, room_id, client_id, priority='background'):
+        self.acquire(room_id, client_id, priority)
+        try:
+            yield
+        finally:
+            self.release(room_id)
+
+    def acquire(self, room_id, client_id, priority='background'):
+        """Block until the frame may run inference; raises InferenceDropped"""
+        waiter = _Waiter(room_id, client_id, priority)
+        with self._lock:
+            room = self._room(room_id)
+            # The fps budget is for periodic frames; interactive requests only count toward max_in_flight
+            if priority != PRIORITY_CLASSES[0] and not room.take_token():
+                raise InferenceDropped('room_quota')
+            previous = self._waiting.get(client_id)
+            if previous is not None:
+                self._drop(previous, 'superseded')
+            self._enqueue(waiter)
+            self._dispatch()
+
+        if not waiter.event.wait(self.max_wait):
+            with self._lock:
+                if waiter.state == 'waiting':
+                    self._drop(waiter, 'queue_timeout')
+        if waiter.state != 'granted':
+            raise InferenceDropped(waiter.reason)
+
+    def release(self, room_id):
+        with self._lock:
+            self._free += 1
+            self._rooms[room_id].in_flight -= 1
+            self._dispatch()
+
+    def _enqueue(self, waiter):
+        flows = self._flows[waiter.priority]
+        flow = flows.get(waiter.room_id)
+        if flow is None:
+            # A room that was idle starts at the current virtual time, so it is
+            # served next, but not before the finish tag of its previous frames
+            start = max(self._virtual_time[waiter.priority], self._rooms[waiter.room_id].finish[waiter.priority])
+            flow = flows[waiter.room_id] = _Flow(start)
+        flow.waiters[waiter.client_id] = waiter
+        self._waiting[waiter.client_id] = waiter
+
+    def _remove(self, waiter):
+        flows = self._flows[waiter.priority]
+        flow = flows[waiter.room_id]
+        del flow.waiters[waiter.client_id]
+        if not flow.waiters:
+            self._rooms[waiter.room_id].finish[waiter.priority] = flow.start
+            del flows[waiter.room_id]
+        del self._waiting[waiter.client_id]
+
+    def _drop(self, waiter, reason):
+        self._remove(waiter)
+        waiter.state = 'dropped'
+        waiter.reason = reason
+        waiter.event.set()
+
+    def _dispatch(self):
+        """Hand free slots to waiting frames (called with the lock held)"""
+        while self._free > 0:
+            chosen = None
+            for priority in PRIORITY_CLASSES:
+                flows = self._flows[priority]
+                eligible = [(flow.start, room_id) for room_id, flow in flows.items()
+                            if self._rooms[room_id].has_capacity()]
+                if eligible:
+                    chosen = priority, min(eligible)[1]
+                    break
+            if chosen is None:
+                return
+
+            priority, room_id = chosen
+            flow = self._flows[priority][room_id]
+            room = self._rooms[room_id]
+            waiter = next(iter(flow.waiters.values()))  # Oldest client first
+            self._virtual_time[priority] = flow.start
+            flow.start += 1.0 / room.weight
+            self._remove(waiter)
+
+            self._free -= 1
+            room.in_flight += 1
+            waiter.state = 'granted'
+            FAIR_QUEUE_WAIT.observe(time.perf_counter() - waiter.enqueued_at, room_id, priority)
+            FAIR_ADMITTED.inc(room_id, priority)
+            waiter.event.set()
+
+    def waiting(self):
+        """Waiting frames per (room, class), for the queue depth gauge"""
+        with self._lock:
+            return {(room_id, priority): len(flow.waiters)
+                    for priority, flows in self._flows.items()
+                    for room_id, flow in flows.items()}
+
+    def in_flight(self):
+        with self._lock:
+            return {(room_id,): room.in_flight for room_id, room in self._rooms.items() if room.in_flight}
+
+    def prune(self, active_rooms):
+        """Forget quota state of rooms that are gone and have nothing queued or running"""
+        with self._lock:
+            busy = {room_id for flows in self._flows.values() for room_id in flows}
+            for room_id in list(self._rooms):
+                if room_id not in active_rooms and room_id not in busy and not self._rooms[room_id].in_flight:
+                    del self._rooms[room_id]
@@ -0,0 +1,67 @@
+"""
+Per-room batching of emotion_update fan-out to HR clients.
+Employee updates are collected per room and flushed once per tick as a
+single emotion_batch message. Within a tick only the latest update of each
+employee is kept, so a busy room costs one emit per HR client per tick
+instead of one per update.
+"""
+
+import threading
+import time
+
+import metrics
+
+FANOUT_UPDATES = metrics.registry.counter(
+    'emotion_fanout_updates_total',
+    'Employee emotion updates by fan-out outcome (sent in a batch or replaced by a newer one)',
+    ('result',))
+
+FANOUT_FLUSHES = metrics.registry.counter(
+    'emotion_fanout_batches_total',
+    'emotion_batch messages flushed (one per room per tick with updates)')
+
+
+class RoomEmitBatcher:
+    """Calls flush(room_id, entries) every interval seconds for rooms with updates"""
+
+    def __init__(self, flush, interval=0.25):
+        self.flush = flush
+        self.interval = interval
+        self._pending = {}  # room_id -> {client_id: entry}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='emit-batcher', daemon=True)
+            self._thread.start()
+
+    def add(self, room_id, client_id, entry):
+        with self._lock:
+            room = self._pending.setdefault(room_id, {})
+            if client_id in room:
+                FANOUT_UPDATES.inc('coalesced')
+            room[client_id] = entry
+
+    def pending(self):
+        return sum(len(room) for room in self._pending.values())
+
+    def flush_all(self):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        for room_id, entries in pending.items():
+            try:
+                self.flush(room_id, list(entries.values()))
+            except Exception as e:
+                print(f"Emit batcher error for room {room_id}: {e}")
+                continue
+            FANOUT_UPDATES.inc('sent', amount=len(entries))
+            FANOUT_FLUSHES.inc()
+
+    def _run(self):
+        next_tick = time.monotonic()
+        while True:
+            # Skip missed ticks instead of flushing back-to-back after a stall
+            next_tick = max(next_tick + self.interval, time.monotonic())
+            time.sleep(max(0.0, next_tick - time.monotonic()))
+            self.flush_all()
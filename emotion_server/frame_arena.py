@@ -0,0 +1,102 @@
+"""
+Shared-memory frame arena for handing decoded frames to inference processes.
+One multiprocessing.shared_memory block is split into fixed-size slots.
+The server writes a decoded frame into a free slot and sends only the small
+(slot, shape) descriptor to a worker, which reads it as a NumPy view without
+copying. The slot returns to the free list once the result has been emitted.
+"""
+
+import threading
+from collections import deque
+from multiprocessing import shared_memory
+
+import numpy as np
+
+
+class ArenaFullError(Exception):
+    """No free slot became available in time"""
+
+
+class FrameArena:
+    """Owner side of the arena (lives in the Socket.IO process)"""
+
+    def __init__(self, slot_count=16, max_shape=(1080, 1920, 3), dtype=np.uint8):
+        self.slot_count = slot_count
+        self.max_shape = tuple(max_shape)
+        self.dtype = np.dtype(dtype)
+        self.slot_bytes = int(np.prod(self.max_shape)) * self.dtype.itemsize
+        self.shm = shared_memory.SharedMemory(create=True, size=self.slot_bytes * slot_count)
+        self._free = deque(range(slot_count))
+        self._cond = threading.Condition()
+
+    @property
+    def spec(self):
+        """Picklable description used by workers to attach()"""
+        return {
+            'name': self.shm.name,
+            'slot_count': self.slot_count,
+            'slot_bytes': self.slot_bytes,
+            'dtype': self.dtype.str
+        }
+
+    def free_slots(self):
+        return len(self._free)
+
+    def fits(self, shape):
+        return len(shape) == len(self.max_shape) and int(np.prod(shape)) * self.dtype.itemsize <= self.slot_bytes
+
+    def acquire(self, timeout=None):
+        """Take a free slot index, waiting up to timeout seconds"""
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._free, timeout):
+                raise ArenaFullError("no free frame slot")
+            return self._free.popleft()
+
+    def release(self, slot):
+        with self._cond:
+            self._free.append(slot)
+            self._cond.notify()
+
+    def view(self, slot, shape):
+        """Writable NumPy view of a slot with the given frame shape"""
+        return slot_view(self.shm.buf, slot, self.slot_bytes, shape, self.dtype)
+
+    def write(self, frame, timeout=None):
+        """Copy a frame into a free slot; returns (slot, shape)"""
+        if not self.fits(frame.shape):
+            raise ValueError(f"frame {frame.shape} does not fit slot {self.max_shape}")
+        slot = self.acquire(timeout)
+        np.copyto(self.view(slot, frame.shape), frame)
+        return slot, frame.shape
+
+    def close(self):
+        self.shm.close()
+        try:
+            self.shm.unlink()
+        except FileNotFoundError:
+            pass
+
+
+def slot_view(buf, slot, slot_bytes, shape, dtype=np.uint8):
+    """NumPy array backed by one slot of a shared buffer"""
+    return np.ndarray(shape, dtype=np.dtype(dtype), buffer=buf, offset=slot * slot_bytes)
+
+
+class ArenaReader:
+    """Worker side: attaches to an existing arena by name"""
+
+    def __init__(self, spec):
+        self.shm = shared_memory.SharedMemory(name=spec['name'])
+        self.slot_bytes = spec['slot_bytes']
+        # Workers started by multiprocessing share the owner's resource
+        # tracker, so attaching here does not take over the block's lifetime
+        self.dtype = np.dtype(spec['dtype'])
+
+    def view(self, slot, shape):
+        """Read-only NumPy view of a slot (no copy)"""
+        array = slot_view(self.shm.buf, slot, self.slot_bytes, shape, self.dtype)
+        array.flags.writeable = False
+        return array
+
+    def close(self):
+        self.shm.close()
@@ -0,0 +1,262 @@
+"""
+Out-of-process inference workers fed through the shared-memory frame arena.
+The Socket.IO process writes each decoded frame into a FrameArena slot and
+sends only (job_id, slot, shape) to the least busy worker. Workers read the
+slot as a NumPy view, run detection, cropping and batched emotion analysis,
+and send back plain face dicts. Workers drain whatever jobs are already
+waiting (up to max_batch) so concurrent clients share one YOLO and one
+emotion call.
+
+Each worker has its own pair of pipes rather than shared queues: a worker
+that dies while holding a shared queue's lock would block every other
+worker. The server therefore knows which jobs each worker holds, and when
+a worker dies those jobs fail, their slots are reused and it is restarted.
+
+Workers start with inference_worker as their main module, so spawning one
+does not re-run the server script (see _spawn_main).
+"""
+
+import atexit
+import importlib.util
+import itertools
+import multiprocessing
+import sys
+import threading
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from contextlib import contextmanager
+from multiprocessing.connection import wait
+
+import metrics
+from frame_arena import FrameArena
+from inference_worker import worker_main
+from resources import environ, thread_env
+
+JOBS_IN_FLIGHT = metrics.registry.gauge(
+    'emotion_worker_jobs_in_flight',
+    'Frames handed to inference workers and not yet answered')
+
+WORKER_RESTARTS = metrics.registry.counter(
+    'emotion_worker_restarts_total',
+    'Inference worker processes that died and were restarted')
+
+
+class WorkerUnavailable(Exception):
+    """The frame was not analyzed by a worker; reason is the frames_dropped label"""
+
+    def __init__(self, reason):
+        super().__init__(reason)
+        self.reason = reason
+
+
+@contextmanager
+def _spawn_main(module_name):
+    """Make processes spawned in this block import module_name as their __main__.
+
+    spawn re-imports the parent's main script (server.py or run_server.py)
+    in every child, rebuilding the Flask app and all server state. When
+    __main__ has a module spec, spawn imports that module by name instead.
+    """
+    main = sys.modules['__main__']
+    saved = getattr(main, '__spec__', None)
+    main.__spec__ = importlib.util.find_spec(module_name)
+    try:
+        yield
+    finally:
+        main.__spec__ = saved
+
+
+class _Worker:
+    """Server-side handle of one worker process"""
+
+    def __init__(self, process, jobs, results):
+        self.process = process
+        self.jobs = jobs  # Send end for (job_id, slot, shape)
+        self.results = results  # Receive end for ('ready' | 'done', key, value)
+        self.send_lock = threading.Lock()
+        self.assigned = {}  # job_id -> Future, sent and not answered
+        self.ready = False
+        self.alive = True
+
+
+class InferencePool:
+    """Owns the frame arena and the worker processes"""
+
+    def __init__(self, processes, settings, slot_count=16, max_shape=(1080, 1920, 3),
+                 max_batch=8, cpu_plan=None):
+        self.arena = FrameArena(slot_count, max_shape)
+        # spawn keeps TensorFlow/PyTorch state out of the forked server process
+        self._ctx = multiprocessing.get_context('spawn')
+        self._settings = settings
+        self._max_batch = max_batch
+        self._cpu_plan = cpu_plan
+        self._lock = threading.Lock()
+        self._state_changed = threading.Condition(self._lock)
+        self._ids = itertools.count()
+        self._closing = False
+
+        self._workers = [self._start_worker(i) for i in range(processes)]
+
+        threading.Thread(target=self._collect_results, name='inference-results', daemon=True).start()
+        metrics.registry.gauge('emotion_frame_arena_free_slots', 'Free slots in the shared frame arena',
+                               callback=lambda: {(): self.arena.free_slots()})
+        metrics.registry.gauge('emotion_inference_workers_ready', 'Inference workers with models loaded',
+                               callback=lambda: {(): self.ready_workers})
+        metrics.register_queue_depth('worker_jobs', self.depth)
+        atexit.register(self.close)
+
+    def _start_worker(self, index):
+        # cpu_plan: one {'threads': n, 'cores': [...], 'pin': bool} per worker
+        budget = self._cpu_plan[index] if self._cpu_plan else {}
+        jobs_recv, jobs_send = self._ctx.Pipe(duplex=False)
+        results_recv, results_send = self._ctx.Pipe(duplex=False)
+        process = self._ctx.Process(target=worker_main, name=f'inference-{index}', daemon=True,
+                                    args=(self.arena.spec, jobs_recv, results_send,
+                                          dict(self._settings, **budget), self._max_batch))
+        # Thread limits must be in the environment before the child imports NumPy
+        with environ(thread_env(budget['threads']) if budget else {}), _spawn_main('inference_worker'):
+            process.start()
+        # Only the child uses these ends; closing ours lets recv() see EOF when it exits
+        jobs_recv.close()
+        results_send.close()
+        return _Worker(process, jobs_send, results_recv)
+
+    @property
+    def ready_workers(self):
+        return sum(1 for worker in self._workers if worker.alive and worker.ready)
+
+    def wait_ready(self, timeout=None):
+        """Block until a worker has loaded its models; False if every worker died first"""
+        with self._state_changed:
+            self._state_changed.wait_for(
+                lambda: self.ready_workers or not any(w.alive for w in self._workers), timeout)
+            return self.ready_workers > 0
+
+    def depth(self):
+        """Frames sent to workers and not answered yet"""
+        return sum(len(worker.assigned) for worker in self._workers)
+
+    def fits(self, frame):
+        return self.arena.fits(frame.shape)
+
+    def submit(self, frame, timeout=None):
+        """Copy frame into the arena and send it to the least busy worker; returns a Future"""
+        slot, shape = self.arena.write(frame, timeout)
+        job_id = next(self._ids)
+        future = Future()
+        future.slot = slot
+        with self._lock:
+            alive = [w for w in self._workers if w.alive]
+            candidates = [w for w in alive if w.ready] or alive
+            if not candidates:
+                self.arena.release(slot)
+                raise WorkerUnavailable('worker_died')
+            worker = min(candidates, key=lambda w: len(w.assigned))
+            worker.assigned[job_id] = future
+        JOBS_IN_FLIGHT.inc()
+        try:
+            with worker.send_lock:
+                worker.jobs.send((job_id, slot, shape))
+        except (OSError, ValueError):
+            pass  # The worker just exited; the result thread fails the job
+        return future
+
+    def result(self, future, timeout=None):
+        """Face dicts of a job; raises WorkerUnavailable on timeout or a dead worker"""
+        try:
+            return future.result(timeout)
+        except FutureTimeout:
+            raise WorkerUnavailable('worker_timeout') from None
+
+    def release(self, future):
+        """Return the job's slot to the arena once the worker is done with it.
+
+        A job that timed out may still be waiting or running in its worker,
+        so its slot is only freed when the worker answers or is found dead.
+        """
+        future.add_done_callback(lambda done: self.arena.release(done.slot))
+
+    def _collect_results(self):
+        """Route worker answers to their Futures and notice workers that exit"""
+        while not self._closing:
+            handles = {}
+            for worker in self._workers:
+                if worker.alive:
+                    handles[worker.results] = worker
+                    handles[worker.process.sentinel] = worker
+            for handle in wait(list(handles), timeout=1.0):
+                worker = handles[handle]
+                if not worker.alive:
+                    continue  # Already handled through its other handle
+                if handle is worker.results:
+                    try:
+                        message = worker.results.recv()
+                    except (EOFError, OSError):
+                        self._worker_exited(worker)
+                        continue
+                    self._handle_message(worker, message)
+                elif not worker.results.poll():
+                    # Exited; answers it sent before exiting are read first
+                    self._worker_exited(worker)
+
+    def _handle_message(self, worker, message):
+        kind, key, value = message
+        if kind == 'ready':
+            with self._state_changed:
+                worker.ready = True
+                self._state_changed.notify_all()
+            print(f"Server: Inference worker {key} ready ({self.ready_workers}/{len(self._workers)})")
+            return
+
+        faces, error = value
+        with self._lock:
+            future = worker.assigned.pop(key, None)
+        if future is None:
+            return
+        JOBS_IN_FLIGHT.dec()
+        if error:
+            future.set_exception(RuntimeError(error))
+        else:
+            future.set_result(faces)
+
+    def _worker_exited(self, worker):
+        """Fail the jobs of a worker that exited and restart it"""
+        process = worker.process
+        process.join(timeout=1)
+        with self._state_changed:
+            worker.alive = False
+            lost = list(worker.assigned.values())
+            worker.assigned.clear()
+            # A worker that never got ready failed loading its models; a restart would too
+            restart = worker.ready and not self._closing
+            if restart:
+                index = self._workers.index(worker)
+                self._workers[index] = self._start_worker(index)
+            self._state_changed.notify_all()
+        worker.jobs.close()
+        worker.results.close()
+
+        # The process is gone, so the slots of its jobs are safe to reuse
+        for future in lost:
+            JOBS_IN_FLIGHT.dec()
+            future.set_exception(WorkerUnavailable('worker_died'))
+        if restart:
+            WORKER_RESTARTS.inc()
+            print(f"Server: Inference worker {process.pid} died (exit code {process.exitcode}), "
+                  f"{len(lost)} frame(s) lost; restarting")
+        elif not self._closing:
+            print(f"Server: Inference worker {process.pid} failed to start (exit code {process.exitcode})")
+
+    def close(self):
+        self._closing = True
+        for worker in self._workers:
+            try:
+                with worker.send_lock:
+                    worker.jobs.send(None)
+            except (OSError, ValueError):
+                pass
+        for worker in self._workers:
+            worker.process.join(timeout=5)
+        try:
+            self.arena.close()
+        except BufferError:
+            pass  # Views still exported; the block is released at exit
@@ -0,0 +1,87 @@
+"""
+Entry module of the inference worker processes (see inference_pool.py).
+Spawned workers run this module as their __main__ instead of the server
+script, so a worker imports only the frame arena, the thread budget and
+vision_core, never Flask, Socket.IO or the server's module-level state.
+"""
+
+import os
+
+from frame_arena import ArenaReader
+from resources import limit_threads, pin_to_cores
+
+
+def _load_backend(settings):
+    """Return (detector, analyzer) inside a worker process"""
+    if settings.get('stub'):
+        from stub_backend import StubFaceDetector, stub_analyze_emotions
+        return StubFaceDetector(), stub_analyze_emotions
+
+    from emotion_tracking import backends, analyze_emotions, warm_up
+    if not backends.YOLO_AVAILABLE:
+        raise ImportError("ultralytics is not installed")
+    detector = backends.YOLO(settings['model_path'])
+    warm_up()
+    return detector, analyze_emotions
+
+
+def worker_main(spec, jobs, results, settings, max_batch):
+    """Entry point of a worker process: load the models, then answer jobs until told to stop"""
+    from emotion_tracking import boxes_from_results, crop_faces
+    from vision_core.preprocess import FaceCrops
+
+    threads = settings.get('threads')
+    if threads:
+        limit_threads(threads)
+    if settings.get('pin'):
+        pin_to_cores(settings['cores'])
+
+    reader = ArenaReader(spec)
+    detector, analyzer = _load_backend(settings)
+    if threads:
+        limit_threads(threads)  # Runtime setters for the libraries that just loaded
+    results.send(('ready', os.getpid(), None))
+
+    running = True
+    while running:
+        try:
+            job = jobs.recv()
+        except EOFError:
+            break  # The server went away
+        if job is None:
+            break
+        batch = [job]
+        # Take whatever else is already waiting, without delaying this job
+        while len(batch) < max_batch and jobs.poll():
+            job = jobs.recv()
+            if job is None:
+                running = False  # Finish this batch, then stop
+                break
+            batch.append(job)
+
+        try:
+            frames = [reader.view(slot, shape) for _, slot, shape in batch]
+            detections = detector(frames, verbose=False, conf=settings['confidence'],
+                                  imgsz=settings['imgsz'])
+
+            per_frame = []
+            crop_sets = []
+            for frame, result in zip(frames, detections):
+                boxes, crops = crop_faces(frame, boxes_from_results([result]),
+                                          settings['pad'], settings['min_size'])
+                per_frame.append(boxes)
+                crop_sets.append(crops)
+
+            # One emotion pass over the crops of every frame in the batch
+            analyses = iter(analyzer(FaceCrops.join(crop_sets)))
+            for (job_id, _, _), boxes in zip(batch, per_frame):
+                faces = []
+                for box in boxes:
+                    emotions, dominant = next(analyses)
+                    faces.append({'bbox': box, 'emotions': emotions, 'dominant_emotion': dominant})
+                results.send(('done', job_id, (faces, None)))
+        except Exception as e:
+            for job_id, _, _ in batch:
+                results.send(('done', job_id, (None, str(e))))
+
+    reader.close()
@@ -0,0 +1,239 @@
+"""
+Lightweight in-process metrics for the Emotion HR server.
+Counters, gauges and histograms are rendered in the Prometheus text
+exposition format on the /metrics endpoint.
+"""
+
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+
+# Default latency buckets in seconds (0.5 ms .. 5 s)
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                   0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+def _format_labels(names, values):
+    if not names:
+        return ''
+    pairs = []
+    for name, value in zip(names, values):
+        value = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        pairs.append(f'{name}="{value}"')
+    return '{' + ','.join(pairs) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Counter:
+    """Monotonically increasing counter, optionally labelled"""
+
+    kind = 'counter'
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labelvalues, amount=1):
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+    def get(self, *labelvalues):
+        return self._values.get(labelvalues, 0)
+
+    def collect(self):
+        with self._lock:
+            items = list(self._values.items())
+        return [(self.name, labels, value) for labels, value in items]
+
+
+class Gauge:
+    """Value that can go up and down, or be computed at scrape time"""
+
+    kind = 'gauge'
+
+    def __init__(self, name, documentation, labelnames=(), callback=None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+        # callback() -> {labelvalues_tuple: value}, evaluated on every scrape
+        self._callback = callback
+
+    def set(self, value, *labelvalues):
+        with self._lock:
+            self._values[labelvalues] = value
+
+    def inc(self, *labelvalues, amount=1):
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+    def dec(self, *labelvalues, amount=1):
+        self.inc(*labelvalues, amount=-amount)
+
+    def get(self, *labelvalues):
+        return self._values.get(labelvalues, 0)
+
+    def collect(self):
+        if self._callback is not None:
+            try:
+                values = dict(self._callback())
+            except Exception as e:
+                print(f"Metrics: gauge callback {self.name} failed: {e}")
+                values = {}
+        else:
+            with self._lock:
+                values = dict(self._values)
+        return [(self.name, labels, value) for labels, value in values.items()]
+
+
+class Histogram:
+    """Cumulative histogram with fixed buckets"""
+
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}  # labelvalues -> [bucket_counts, sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labelvalues):
+        # Bucket lookup happens outside the lock; only the increments are guarded
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labelvalues)
+            if series is None:
+                series = [[0] * (len(self.buckets) + 1), 0.0, 0]
+                self._series[labelvalues] = series
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    @contextmanager
+    def time(self, *labelvalues):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, *labelvalues)
+
+    def get_count(self, *labelvalues):
+        series = self._series.get(labelvalues)
+        return series[2] if series else 0
+
+    def collect(self):
+        with self._lock:
+            snapshot = [(labels, list(series[0]), series[1], series[2])
+                        for labels, series in self._series.items()]
+        samples = []
+        for labels, counts, total, count in snapshot:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                samples.append((self.name + '_bucket', labels + (_format_value(bound),), cumulative))
+            samples.append((self.name + '_sum', labels, total))
+            samples.append((self.name + '_count', labels, count))
+        return samples
+
+
+class MetricsRegistry:
+    """Holds all metrics and renders them for scraping"""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric):
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name, documentation, labelnames=(), callback=None):
+        return self._register(Gauge(name, documentation, labelnames, callback))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self):
+        """Render every metric in the Prometheus text format (version 0.0.4)"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            labelnames = metric.labelnames
+            for sample_name, labelvalues, value in metric.collect():
+                names = labelnames + ('le',) if sample_name.endswith('_bucket') else labelnames
+                lines.append(f"{sample_name}{_format_labels(names, labelvalues)} {_format_value(value)}")
+        return '\n'.join(lines) + '\n'
+
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# ============ SERVER METRICS ============
+registry = MetricsRegistry()
+
+STAGE_LATENCY = registry.histogram(
+    'emotion_stage_duration_seconds',
+    'Time spent in each stage of the frame processing path',
+    ('stage',))
+
+FRAMES_RECEIVED = registry.counter(
+    'emotion_frames_received_total',
+    'Frames received from clients',
+    ('event',))
+
+FRAMES_PROCESSED = registry.counter(
+    'emotion_frames_processed_total',
+    'Frames that completed server-side analysis',
+    ('event',))
+
+FRAMES_DROPPED = registry.counter(
+    'emotion_frames_dropped_total',
+    'Frames that were received but not analyzed',
+    ('event', 'reason'))
+
+FACES_ANALYZED = registry.counter(
+    'emotion_faces_analyzed_total',
+    'Face crops passed to the emotion model',
+    ('event',))
+
+PROCESSING_ERRORS = registry.counter(
+    'emotion_processing_errors_total',
+    'Exceptions raised while processing client events',
+    ('event',))
+
+
+def time_stage(stage):
+    """Context manager timing one stage of the frame path"""
+    return STAGE_LATENCY.time(stage)
+
+
+def register_queue_depth(name, callback):
+    """Expose a queue depth computed by callback() -> int at scrape time"""
+    return registry.gauge(
+        f'emotion_{name}_queue_depth',
+        f'Items currently waiting in the {name} queue',
+        callback=lambda: {(): callback()})
@@ -0,0 +1,188 @@
+"""
+Cheap face-presence checks ("is the employee at their desk?").
+A presence check runs only the face detector, on a frame downscaled to a
+few hundred pixels, and never crops or analyzes emotions, so it can run
+several times per second per employee while the full emotion pipeline runs
+every few seconds. Presence gets its own YOLO instances, separate from the
+emotion pipeline's, because an ultralytics predictor keeps the arguments
+of its last call (including imgsz) and is not safe to share between
+threads. Without ultralytics, or in worker-process mode where YOLO lives
+in the workers, OpenCV's bundled Haar cascade is used instead.
+
+Neither detector can run two checks at once, so a DetectorPool keeps a few
+instances and each check borrows an idle one; handler threads only wait
+when every instance is busy.
+
+PresenceBoard keeps the latest result per employee and summarizes a room
+for get_room_stats.
+"""
+
+import queue
+import threading
+
+import metrics
+from vision_core import backends
+
+PRESENCE_CHECKS = metrics.registry.counter(
+    'emotion_presence_checks_total',
+    'presence_frame detections, by detector and result',
+    ('detector', 'result'))
+
+
+def shrink(frame, width):
+    """Downscale frame to at most width pixels wide"""
+    height, frame_width = frame.shape[:2]
+    if frame_width <= width:
+        return frame
+    size = (width, max(1, round(height * width / frame_width)))
+    return backends.cv2.resize(frame, size, interpolation=backends.cv2.INTER_AREA)
+
+
+class YoloPresence:
+    """Face count from a YOLO model run at a small input size"""
+
+    name = 'yolo'
+
+    def __init__(self, model, width, confidence):
+        self.model = model
+        self.width = width
+        self.confidence = confidence
+        # ultralytics needs an input size that is a multiple of the 32 px stride
+        self.imgsz = max(32, -(-width // 32) * 32)
+
+    def __call__(self, frame):
+        small = shrink(frame, self.width)
+        results = self.model(small, verbose=False, conf=self.confidence, imgsz=self.imgsz)
+        return sum(len(result.boxes.xyxy) for result in results)
+
+
+class CascadePresence:
+    """Face count from OpenCV's frontal-face Haar cascade (no extra model files)"""
+
+    name = 'cascade'
+
+    def __init__(self, width, min_size=20):
+        cv2 = backends.cv2
+        path = cv2.data.haarcascades + 'haarcascade_frontalface_default.xml'
+        self.classifier = cv2.CascadeClassifier(path)
+        if self.classifier.empty():
+            raise RuntimeError(f"could not load {path}")
+        self.width = width
+        self.min_size = min_size
+
+    def __call__(self, frame):
+        cv2 = backends.cv2
+        small = shrink(frame, self.width)
+        if small.ndim == 3:
+            small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        faces = self.classifier.detectMultiScale(small, scaleFactor=1.1, minNeighbors=4,
+                                                 minSize=(self.min_size, self.min_size))
+        return len(faces)
+
+
+class DetectorPool:
+    """Detector instances shared by the handler threads, one check per instance at a time"""
+
+    def __init__(self, detectors):
+        self.name = detectors[0].name
+        self.size = len(detectors)
+        self._idle = queue.LifoQueue()  # Most recently used first, so its caches stay warm
+        for detector in detectors:
+            self._idle.put(detector)
+
+    def __call__(self, frame):
+        detector = self._idle.get()
+        try:
+            return detector(frame)
+        finally:
+            self._idle.put(detector)
+
+
+def load_presence_detector(kind, width, confidence, model_path=None, stub=False, instances=1):
+    """DetectorPool of `instances` presence detectors for kind ('auto', 'yolo', 'cascade'), or None.
+
+    YOLO is loaded from model_path (a stub detector when stub is set); with
+    no model_path, or when loading fails, the OpenCV cascade is used.
+    """
+    instances = max(1, instances)
+    if kind in ('auto', 'yolo') and (model_path or stub):
+        try:
+            if stub:
+                from stub_backend import StubFaceDetector
+                models = [StubFaceDetector() for _ in range(instances)]
+            elif backends.YOLO_AVAILABLE:
+                models = [backends.YOLO(model_path) for _ in range(instances)]
+            else:
+                raise ImportError("ultralytics is not installed")
+            return DetectorPool([YoloPresence(model, width, confidence) for model in models])
+        except Exception as e:
+            print(f"Presence: Could not load YOLO ({e}), falling back to the OpenCV cascade")
+    elif kind == 'yolo':
+        print("Presence: No YOLO model in this process, falling back to the OpenCV cascade")
+    if not backends.CV2_AVAILABLE:
+        return None
+    try:
+        return DetectorPool([CascadePresence(width) for _ in range(instances)])
+    except Exception as e:
+        print(f"Presence: OpenCV cascade unavailable: {e}")
+        return None
+
+
+def count_faces(detector, frame):
+    """Run one presence check and record it"""
+    with metrics.time_stage('presence'):
+        count = detector(frame)
+    PRESENCE_CHECKS.inc(detector.name, 'present' if count else 'absent')
+    return count
+
+
+class PresenceBoard:
+    """Latest face presence per client"""
+
+    def __init__(self, min_interval, max_age):
+        self.min_interval = min_interval
+        self.max_age = max_age
+        self._clients = {}  # client_id -> {'face_count', 'updated', 'checked'}
+        self._lock = threading.Lock()
+
+    def should_check(self, client_id, now):
+        """Rate cap for presence frames; reserves the slot when allowed"""
+        with self._lock:
+            state = self._clients.setdefault(client_id, {'face_count': None, 'updated': None, 'checked': None})
+            if state['checked'] is not None and now - state['checked'] < self.min_interval:
+                return False
+            state['checked'] = now
+            return True
+
+    def update(self, client_id, face_count, now):
+        """Record a result; True when presence or the face count changed"""
+        with self._lock:
+            state = self._clients.setdefault(client_id, {'face_count': None, 'updated': None, 'checked': None})
+            stale = state['updated'] is None or now - state['updated'] > self.max_age
+            changed = stale or state['face_count'] != face_count
+            state['face_count'] = face_count
+            state['updated'] = now
+            return changed
+
+    def get(self, client_id, now):
+        """(present, face_count) or None when unknown or stale"""
+        state = self._clients.get(client_id)
+        if state is None or state['updated'] is None or now - state['updated'] > self.max_age:
+            return None
+        return state['face_count'] > 0, state['face_count']
+
+    def summary(self, client_ids, now):
+        """Presence counts over client_ids (the employees of a room)"""
+        summary = {'present': 0, 'absent': 0, 'unknown': 0, 'faces': 0}
+        for client_id in client_ids:
+            result = self.get(client_id, now)
+            if result is None:
+                summary['unknown'] += 1
+            else:
+                summary['present' if result[0] else 'absent'] += 1
+                summary['faces'] += result[1]
+        return summary
+
+    def forget(self, client_id):
+        with self._lock:
+            self._clients.pop(client_id, None)
@@ -0,0 +1,131 @@
+"""
+On-demand sampling profiler for the Emotion HR server.
+A background thread samples every thread's stack for a fixed window and
+aggregates them as collapsed stacks ("a;b;c count"), the input format of
+flamegraph.pl, speedscope and inferno. Nothing runs while idle.
+"""
+
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+
+MAX_WINDOW_SECONDS = 300
+DEFAULT_INTERVAL = 0.005  # 200 Hz
+TRACEMALLOC_TOP = 50
+
+
+def _frame_label(frame):
+    code = frame.f_code
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}"
+
+
+class SamplingProfiler:
+    """Samples thread stacks via sys._current_frames() for a fixed window"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop_event = threading.Event()
+        self._stacks = Counter()
+        self._samples = 0
+        self._started_at = None
+        self._finished_at = None
+        self._duration = 0
+        self._interval = DEFAULT_INTERVAL
+        self._trace_memory = False
+        self._owns_tracemalloc = False
+        self._memory_report = None
+
+    @property
+    def active(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, duration=30, interval=DEFAULT_INTERVAL, trace_memory=False):
+        """Begin a profiling window. Returns False if one is already running."""
+        with self._lock:
+            if self.active:
+                return False
+            self._duration = max(1, min(float(duration), MAX_WINDOW_SECONDS))
+            self._interval = max(0.001, float(interval))
+            self._trace_memory = bool(trace_memory)
+            self._stacks = Counter()
+            self._samples = 0
+            self._memory_report = None
+            self._started_at = time.time()
+            self._finished_at = None
+            self._stop_event.clear()
+
+            self._owns_tracemalloc = self._trace_memory and not tracemalloc.is_tracing()
+            if self._owns_tracemalloc:
+                tracemalloc.start(25)
+
+            self._thread = threading.Thread(target=self._run, name='profiler', daemon=True)
+            self._thread.start()
+            return True
+
+    def stop(self):
+        """End the current window early and wait for the sampler to finish"""
+        self._stop_event.set()
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout=5)
+
+    def _run(self):
+        own_ident = threading.get_ident()
+        deadline = time.perf_counter() + self._duration
+        interval = self._interval
+
+        while not self._stop_event.is_set() and time.perf_counter() < deadline:
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own_ident:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame))
+                    frame = frame.f_back
+                stack.append(names.get(ident, f"thread-{ident}"))
+                self._stacks[';'.join(reversed(stack))] += 1
+            self._samples += 1
+            self._stop_event.wait(interval)
+
+        if self._trace_memory and tracemalloc.is_tracing():
+            snapshot = tracemalloc.take_snapshot()
+            if self._owns_tracemalloc:
+                tracemalloc.stop()
+            lines = [f"# tracemalloc top {TRACEMALLOC_TOP} allocation sites by size"]
+            for stat in snapshot.statistics('lineno')[:TRACEMALLOC_TOP]:
+                lines.append(str(stat))
+            self._memory_report = '\n'.join(lines) + '\n'
+
+        self._finished_at = time.time()
+
+    def status(self):
+        return {
+            'active': self.active,
+            'started_at': self._started_at,
+            'finished_at': self._finished_at,
+            'duration': self._duration,
+            'interval': self._interval,
+            'samples': self._samples,
+            'unique_stacks': len(self._stacks),
+            'tracemalloc': self._trace_memory,
+            'memory_report_ready': self._memory_report is not None,
+        }
+
+    def collapsed_stacks(self):
+        """Collapsed-stack text of the last finished window, or None"""
+        if self.active or self._finished_at is None:
+            return None
+        return ''.join(f"{stack} {count}\n" for stack, count in self._stacks.most_common())
+
+    def memory_report(self):
+        if self.active:
+            return None
+        return self._memory_report
+
+
+profiler = SamplingProfiler()
@@ -0,0 +1,125 @@
+"""
+CPU thread budget for inference.
+TensorFlow (DeepFace), PyTorch (ultralytics), OpenCV and the BLAS behind
+NumPy each size their thread pools to every core by default, so several
+inference workers plus the Socket.IO threads oversubscribe the CPU. This
+module splits the available cores between workers, caps each library's
+thread pools to a worker's share and can pin a worker to its cores.
+
+Thread pools are sized when a library initializes, so limit_threads() sets
+the environment variables for libraries that are not imported yet and
+calls the runtime setters of those that are.
+"""
+
+import os
+import sys
+from contextlib import contextmanager
+
+try:
+    import threadpoolctl
+    THREADPOOLCTL_AVAILABLE = True
+except ImportError:
+    threadpoolctl = None
+    THREADPOOLCTL_AVAILABLE = False
+
+# Read by OpenMP/BLAS (NumPy, PyTorch) and TensorFlow at initialization
+THREAD_ENV_VARS = ('OMP_NUM_THREADS', 'MKL_NUM_THREADS', 'OPENBLAS_NUM_THREADS',
+                   'NUMEXPR_NUM_THREADS', 'VECLIB_MAXIMUM_THREADS', 'TF_NUM_INTRAOP_THREADS')
+
+
+def available_cores():
+    """Cores this process may run on"""
+    if hasattr(os, 'sched_getaffinity'):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def partition_cores(workers, reserved=1, cores=None):
+    """Split cores into one list per worker, keeping `reserved` for the web layer.
+
+    With fewer cores than workers, workers share cores round-robin.
+    """
+    cores = list(cores if cores is not None else available_cores())
+    workers = max(1, workers)
+    # Never reserve so many that inference is left without a core
+    usable = cores[min(reserved, len(cores) - 1):] if reserved > 0 else cores
+    if len(usable) < workers:
+        return [[usable[i % len(usable)]] for i in range(workers)]
+    share, extra = divmod(len(usable), workers)
+    plan, start = [], 0
+    for i in range(workers):
+        size = share + (1 if i < extra else 0)
+        plan.append(usable[start:start + size])
+        start += size
+    return plan
+
+
+def thread_env(threads):
+    env = {name: str(threads) for name in THREAD_ENV_VARS}
+    # Inter-op parallelism beyond 2 only adds contention for small batches
+    env['TF_NUM_INTEROP_THREADS'] = str(min(2, threads))
+    return env
+
+
+@contextmanager
+def environ(values):
+    """Temporarily set environment variables (e.g. while starting a process)"""
+    saved = {name: os.environ.get(name) for name in values}
+    os.environ.update(values)
+    try:
+        yield
+    finally:
+        for name, value in saved.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+
+
+def limit_threads(threads):
+    """Cap every inference library in this process to `threads` threads.
+
+    Returns the names of the libraries that were configured at runtime.
+    """
+    os.environ.update(thread_env(threads))
+    configured = []
+
+    if 'cv2' in sys.modules:
+        sys.modules['cv2'].setNumThreads(threads)
+        configured.append('opencv')
+
+    if 'torch' in sys.modules:
+        torch = sys.modules['torch']
+        torch.set_num_threads(threads)
+        try:
+            torch.set_num_interop_threads(min(2, threads))
+        except RuntimeError:
+            pass  # Only allowed before the first parallel op
+        configured.append('torch')
+
+    if 'tensorflow' in sys.modules:
+        threading_config = sys.modules['tensorflow'].config.threading
+        try:
+            threading_config.set_intra_op_parallelism_threads(threads)
+            threading_config.set_inter_op_parallelism_threads(min(2, threads))
+            configured.append('tensorflow')
+        except RuntimeError:
+            pass  # TF already initialized; TF_NUM_INTRAOP_THREADS applied if set in time
+
+    if THREADPOOLCTL_AVAILABLE:
+        threadpoolctl.threadpool_limits(threads)
+        configured.append('blas')
+
+    return configured
+
+
+def pin_to_cores(cores):
+    """Restrict this process to `cores`; returns False where unsupported"""
+    if not cores or not hasattr(os, 'sched_setaffinity'):
+        return False
+    try:
+        os.sched_setaffinity(0, cores)
+    except OSError as e:
+        print(f"Could not pin process {os.getpid()} to cores {cores}: {e}")
+        return False
+    return True
@@ -6,6 +6,7 @@ Run this script to start the central Emotion HR server.
 
 import os
 import sys
+import importlib.util
 import subprocess
 import platform
 import socket
@@ -23,18 +24,21 @@ def get_local_ip():
         return "localhost"
 
 def check_requirements():
-    """Check if required packages are installed"""
+    """Check if required packages are installed (without importing the heavy ones)"""
+    required = ['flask', 'flask_socketio']
     try:
-        import flask
-        import flask_socketio
-        import cv2
-        import ultralytics
-        print("✅ All required packages are installed")
-        return True
-    except ImportError as e:
-        print(f"❌ Missing required package: {e}")
+        from config import INFERENCE_ENABLED
+    except ImportError:
+        INFERENCE_ENABLED = True
+    if INFERENCE_ENABLED:
+        required += ['cv2', 'ultralytics']
+    missing = [name for name in required if importlib.util.find_spec(name) is None]
+    if missing:
+        print(f"❌ Missing required package: {', '.join(missing)}")
         print("Please run: pip install -r requirements.txt")
         return False
+    print("✅ All required packages are installed")
+    return True
 
 def check_models():
     """Check if required model files exist"""
@@ -52,13 +56,14 @@ def check_models():
         return False
 
 def main():
+    from config import SERVER_HOST, SERVER_PORT
     local_ip = get_local_ip()
 
     print("=" * 70)
     print("🖥️  EMOTION HR SERVER LAUNCHER")
     print("=" * 70)
-    print(f"📍 Server will run on: http://0.0.0.0:5000")
-    print(f"🌐 Local network IP: http://{local_ip}:5000")
+    print(f"📍 Server will run on: http://{SERVER_HOST}:{SERVER_PORT}")
+    print(f"🌐 Local network IP: http://{local_ip}:{SERVER_PORT}")
     print("=" * 70)
 
     # Check requirements
@@ -72,9 +77,9 @@ def main():
     print("📡 WebSocket server ready for distributed emotion monitoring")
     print("=" * 70)
     print("🌐 Client Connection URLs:")
-    print(f"   Employee Client: http://{local_ip}:5000/employee")
-    print(f"   HR Dashboard:    http://{local_ip}:5000/hr")
-    print(f"   Landing Page:    http://{local_ip}:5000")
+    print(f"   Employee Client: http://{local_ip}:{SERVER_PORT}/employee")
+    print(f"   HR Dashboard:    http://{local_ip}:{SERVER_PORT}/hr")
+    print(f"   Landing Page:    http://{local_ip}:{SERVER_PORT}")
     print("=" * 70)
     print("📋 Instructions for Clients:")
     print(f"   1. Copy this IP address: {local_ip}")
@@ -83,15 +88,16 @@ def main():
     print("   4. Use same Room ID on all clients")
     print("=" * 70)
     print("⚠️  Network Notes:")
-    print("   - Ensure port 5000 is open in firewall")
+    print(f"   - Ensure port {SERVER_PORT} is open in firewall")
     print("   - All clients must be on same network")
     print("   - Press Ctrl+C to stop server")
     print("=" * 70)
 
     try:
         # Import and run server
-        from server import socketio, app
-        socketio.run(app, host='0.0.0.0', port=5000, debug=False)
+        from server import socketio, app, start_background_services
+        start_background_services()
+        socketio.run(app, host=SERVER_HOST, port=SERVER_PORT, debug=False, allow_unsafe_werkzeug=True)
 
     except KeyboardInterrupt:
         print("\n👋 Shutting down Emotion HR Server...")
@@ -100,7 +106,7 @@ def main():
     except Exception as e:
         print(f"\n❌ Error starting server: {e}")
         print("💡 Check that:")
-        print("   - Port 5000 is not in use")
+        print(f"   - Port {SERVER_PORT} is not in use")
         print("   - All dependencies are installed")
         print("   - Model files exist")
         sys.exit(1)
@@ -1,17 +1,45 @@
-from flask import Flask, render_template, request, jsonify
+import time
+_import_started = time.perf_counter()
+from flask import Flask, render_template, request, jsonify, Response
 from flask_socketio import SocketIO, emit, join_room, leave_room
 from flask_cors import CORS
 import json
 import threading
-import time
+from contextlib import nullcontext
 from datetime import datetime
 import base64
-# OpenCV imports are handled conditionally to avoid NumPy compatibility issues
+# OpenCV, ultralytics and DeepFace are loaded in the background by init_models()
+# so the web layer starts immediately; relay-only nodes never import them
 CV2_AVAILABLE = False
 cv2 = None
 np = None
-from emotion_tracking import analyze_emotion, YOLO_MODEL_PATH, CONFIDENCE_THRESHOLD
-# from ultralytics import YOLO  # Commented out due to NumPy compatibility issues
+from emotion_tracking import analyze_emotions, warm_up, EmotionPipeline, boxes_from_results, YOLO_MODEL_PATH, CONFIDENCE_THRESHOLD
+import metrics
+from config import DETECT_IMAGE_SIZE
+from config import STUB_INFERENCE, INFERENCE_ENABLED, SERVER_HOST, SERVER_PORT, ADMIN_TOKEN, CROP_PADDING, MIN_FACE_SIZE
+from config import BATCHING_ENABLED, DETECT_BATCH_SIZE, EMOTION_BATCH_SIZE, BATCH_MAX_WAIT_MS
+from config import INFERENCE_PROCESSES, FRAME_ARENA_SLOTS, FRAME_SLOT_MAX_SHAPE, WORKER_TIMEOUT
+from config import FAIR_SCHEDULING_ENABLED, INFERENCE_SLOTS, FAIR_MAX_WAIT, ROOM_QUOTA_DEFAULT, ROOM_QUOTAS
+from config import FANOUT_INTERVAL_MS, SNAPSHOT_PATH, SNAPSHOT_INTERVAL, MAX_DATA_AGE
+from batching import BatchScheduler
+from fairness import FairScheduler, InferenceDropped
+from fanout import RoomEmitBatcher
+from snapshot import SnapshotWriter, read_snapshot
+from alerts import AlertEngine
+from presence import PresenceBoard, count_faces, load_presence_detector
+from resources import available_cores, partition_cores, limit_threads
+from config import THREAD_BUDGET_ENABLED, INFERENCE_THREADS, RESERVED_CORES, PIN_INFERENCE_WORKERS
+from config import ALERTS_ENABLED, ALERT_RULES, ALERT_WINDOW_SECONDS, ALERT_EMA_SECONDS, ALERT_COOLDOWN
+from config import PRESENCE_ENABLED, PRESENCE_DETECTOR, PRESENCE_FRAME_WIDTH, PRESENCE_MIN_INTERVAL_MS, PRESENCE_MAX_AGE
+from config import PRESENCE_DETECTORS
+from frame_arena import ArenaFullError
+from inference_pool import InferencePool, WorkerUnavailable
+import codec
+from profiling import profiler
+import hmac
+from metrics import time_stage, FRAMES_RECEIVED, FRAMES_PROCESSED, FRAMES_DROPPED, FACES_ANALYZED, PROCESSING_ERRORS
+from vision_core import backends
+from vision_core.preprocess import FaceCrops
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'emotion-hr-secret-key-2026'
@@ -22,17 +50,389 @@ socketio = SocketIO(app, cors_allowed_origins="*", async_mode='threading')
 connected_clients = {}  # client_id -> {'type': 'employee'/'hr', 'room': room_id}
 emotion_data = {}  # room_id -> list of recent emotion entries
 face_detection_model = None
+detect_lock = threading.Lock()  # One YOLO predictor must not run on two threads at once
+client_pipelines = {}  # client_id -> (EmotionPipeline, Lock); keeps face track ids per client
+pipelines_lock = threading.Lock()
+detect_scheduler = None  # BatchScheduler for YOLO across clients
+emotion_scheduler = None  # BatchScheduler for face crops across clients
+inference_pool = None  # InferencePool when INFERENCE_PROCESSES > 0
+presence_detector = None  # Detector-only face counter for presence_frame, see presence.py
+room_members = {}  # room_id -> {sid: (user_type, encoding)}, so fan-out never scans every client
+members_lock = threading.Lock()
+room_interners = {}  # room_id -> codec.ClientInterner for msgpack clients
+interners_lock = threading.Lock()
+known_clients = {}  # client_key -> last room/type/name/client_id, for reconnects and restarts
+client_keys = {}  # client_id -> the client_key it owns (kept out of connected_clients, which HR sees)
+state_changes = 0  # bumped on every change worth a new snapshot
+model_status = {
+    'state': 'pending',  # pending -> loading -> ready / failed, or disabled
+    'load_seconds': None,
+    'error': None,
+    'cpu': None,  # Thread budget, see plan_cpu()
+    'presence': None  # Presence detector in use ('yolo', 'cascade') or None
+}
+
+def _clients_per_room():
+    counts = {}
+    for info in list(connected_clients.values()):
+        key = (info.get('room'), info.get('type'))
+        counts[key] = counts.get(key, 0) + 1
+    return counts
+
+metrics.registry.gauge('emotion_connected_clients', 'Connected clients per room and type',
+                       ('room', 'type'), callback=_clients_per_room)
+metrics.registry.gauge('emotion_rooms', 'Rooms with stored emotion history',
+                       callback=lambda: {(): len(emotion_data)})
+metrics.registry.gauge('emotion_backend_import_seconds', 'Time spent importing each vision library',
+                       ('library',), callback=lambda: {(name,): t for name, t in backends.import_times.items()})
+
+def plan_cpu():
+    """Thread budget per inference worker ({'threads', 'cores', 'pin'}), or None"""
+    if not THREAD_BUDGET_ENABLED:
+        return None
+    workers = max(1, INFERENCE_PROCESSES)
+    plan = []
+    for cores in partition_cores(workers, RESERVED_CORES):
+        plan.append({
+            'threads': INFERENCE_THREADS or len(cores),
+            'cores': cores,
+            # In-process inference shares the process with the web threads, so it is never pinned
+            'pin': PIN_INFERENCE_WORKERS and INFERENCE_PROCESSES > 0
+        })
+    model_status['cpu'] = plan
+    print(f"Server: CPU budget {len(plan)} worker(s) x {plan[0]['threads']} thread(s), "
+          f"cores {[entry['cores'] for entry in plan]}{' (pinned)' if plan[0]['pin'] else ''}")
+    return plan
 
 # Initialize YOLO model for server-side processing
 def init_models():
-    global face_detection_model
+    """Import the vision stack and load models; runs on a background thread"""
+    global face_detection_model, analyze_emotions, cv2, np, CV2_AVAILABLE, inference_pool
+    if not INFERENCE_ENABLED:
+        model_status['state'] = 'disabled'
+        print("Server: Inference disabled (relay-only node)")
+        return
+
+    model_status['state'] = 'loading'
+    start = time.perf_counter()
+    cpu_plan = plan_cpu()
+    if cpu_plan and INFERENCE_PROCESSES == 0:
+        # Before the vision stack is imported, so TF/torch size their pools from it
+        limit_threads(cpu_plan[0]['threads'])
     try:
-        from ultralytics import YOLO
-        face_detection_model = YOLO(YOLO_MODEL_PATH)
-        print("Server: YOLO Face Detection Model Loaded")
+        if backends.CV2_AVAILABLE:
+            cv2 = backends.cv2
+            np = backends.np
+            CV2_AVAILABLE = True
+
+        if INFERENCE_PROCESSES > 0:
+            # Models load in the worker processes; this process only decodes frames
+            inference_pool = InferencePool(INFERENCE_PROCESSES, {
+                'stub': STUB_INFERENCE,
+                'model_path': YOLO_MODEL_PATH,
+                'confidence': CONFIDENCE_THRESHOLD,
+                'imgsz': DETECT_IMAGE_SIZE,
+                'pad': CROP_PADDING,
+                'min_size': MIN_FACE_SIZE
+            }, FRAME_ARENA_SLOTS, FRAME_SLOT_MAX_SHAPE, DETECT_BATCH_SIZE, cpu_plan)
+            print(f"Server: Started {INFERENCE_PROCESSES} inference worker(s), "
+                  f"{FRAME_ARENA_SLOTS} shared frame slots")
+            # Frames sent before any worker has its models would only fill the arena
+            if not inference_pool.wait_ready():
+                raise RuntimeError("no inference worker could load the models")
+        elif STUB_INFERENCE:
+            from stub_backend import StubFaceDetector, stub_analyze_emotions
+            analyze_emotions = stub_analyze_emotions
+            face_detection_model = StubFaceDetector()
+            print("Server: Using stub inference backend")
+        else:
+            if not backends.YOLO_AVAILABLE:
+                raise ImportError("ultralytics is not installed")
+            model = backends.YOLO(YOLO_MODEL_PATH)
+            print("Server: YOLO Face Detection Model Loaded")
+            # Import DeepFace/TensorFlow now rather than on the first frame
+            if warm_up():
+                print("Server: DeepFace Emotion Model Loaded")
+            face_detection_model = model
+
+        if cpu_plan and inference_pool is None:
+            limit_threads(cpu_plan[0]['threads'])  # Runtime setters for the libraries just loaded
+        if BATCHING_ENABLED and inference_pool is None:
+            start_schedulers()
+        model_status['state'] = 'ready'
     except Exception as e:
         print(f"Server: Failed to load YOLO model: {e}")
         face_detection_model = None
+        model_status['state'] = 'failed'
+        model_status['error'] = str(e)
+    finally:
+        model_status['load_seconds'] = time.perf_counter() - start
+        imports = ', '.join(f"{name} {seconds:.1f}s" for name, seconds in backends.import_times.items())
+        print(f"Server: Vision stack {model_status['state']} in {model_status['load_seconds']:.1f}s ({imports})")
+
+    # Presence only needs OpenCV, so the cascade still works when YOLO failed to load
+    if presence_board is not None and CV2_AVAILABLE:
+        init_presence()
+
+def init_presence():
+    """Pick the presence detector: a YOLO instance of its own, else the OpenCV cascade"""
+    global presence_detector
+    # Worker processes hold YOLO in pool mode; the server process only gets the cascade
+    model_path = YOLO_MODEL_PATH if inference_pool is None else None
+    instances = PRESENCE_DETECTORS or min(4, len(available_cores()))
+    presence_detector = load_presence_detector(PRESENCE_DETECTOR, PRESENCE_FRAME_WIDTH, CONFIDENCE_THRESHOLD,
+                                               model_path, STUB_INFERENCE and inference_pool is None, instances)
+    if presence_detector is None:
+        print("Server: Presence checks unavailable")
+        return
+    model_status['presence'] = presence_detector.name
+    print(f"Server: Presence checks with {presence_detector.size} {presence_detector.name} "
+          f"detector(s) at {PRESENCE_FRAME_WIDTH} px")
+
+def _detect_batch(frames):
+    # imgsz on every call: an ultralytics predictor otherwise keeps the last call's value
+    with detect_lock:
+        results = face_detection_model(frames, verbose=False, conf=CONFIDENCE_THRESHOLD,
+                                       imgsz=DETECT_IMAGE_SIZE)
+    return [boxes_from_results([result]) for result in results]
+
+def start_schedulers():
+    """Create the cross-client batching schedulers for detection and emotion"""
+    global detect_scheduler, emotion_scheduler
+    max_wait = BATCH_MAX_WAIT_MS / 1000.0
+    detect_scheduler = BatchScheduler('detect', _detect_batch, DETECT_BATCH_SIZE, max_wait)
+    emotion_scheduler = BatchScheduler('emotion', _analyze_crop_sets, EMOTION_BATCH_SIZE, max_wait, item_size=len)
+    print(f"Server: Batching up to {DETECT_BATCH_SIZE} frames / {EMOTION_BATCH_SIZE} faces, {BATCH_MAX_WAIT_MS} ms max wait")
+
+def detect_faces(frame):
+    if detect_scheduler is not None:
+        return detect_scheduler.submit(frame).result()
+    return _detect_batch([frame])[0]
+
+def _analyze_crop_sets(crop_sets):
+    """Analyze the FaceCrops of several frames in one classifier call"""
+    results = iter(analyze_emotions(FaceCrops.join(crop_sets)))
+    return [[next(results) for _ in range(len(crops))] for crops in crop_sets]
+
+def analyze_crops(crops):
+    if emotion_scheduler is not None:
+        # One item per frame; the batch limit counts faces
+        return emotion_scheduler.submit(crops).result()
+    return analyze_emotions(crops)
+
+def start_background_services():
+    """Start model loading, HR fan-out and data cleanup without blocking the web layer"""
+    restore_state()
+    if snapshot_writer is not None:
+        snapshot_writer.start()
+    if emit_batcher is not None:
+        emit_batcher.start()
+    threading.Thread(target=init_models, name='model-loader', daemon=True).start()
+    threading.Thread(target=cleanup_old_data, name='cleanup', daemon=True).start()
+
+def collect_state():
+    """Copy of the state saved in snapshots (runs on the snapshot thread)"""
+    return {
+        'emotion_data': {room_id: list(entries) for room_id, entries in list(emotion_data.items())},
+        'known_clients': dict(known_clients)
+    }
+
+def restore_state():
+    """Load recent emotion history and client rooms from the last snapshot"""
+    if snapshot_writer is None:
+        return
+    state = read_snapshot(SNAPSHOT_PATH)
+    if state is None:
+        return
+    age = time.time() - state['saved_at']
+    if age > MAX_DATA_AGE:
+        print(f"Snapshot: Ignoring {SNAPSHOT_PATH}, saved {age:.0f}s ago")
+        return
+    for room_id, entries in state['emotion_data'].items():
+        emotion_data[room_id] = entries + emotion_data.get(room_id, [])
+    for client_key, info in state['known_clients'].items():
+        known_clients.setdefault(client_key, info)
+    print(f"Snapshot: Restored {len(state['emotion_data'])} room(s) and "
+          f"{len(state['known_clients'])} client(s) saved {age:.0f}s ago")
+
+def reassign_client(room_id, old_client_id, new_client_id):
+    """Move a returning client's history to its new Socket.IO id"""
+    entries = emotion_data.get(room_id, [])
+    for i, entry in enumerate(entries):
+        if entry['client_id'] == old_client_id:
+            # Replace rather than mutate: the snapshot thread may be packing the old dict
+            entries[i] = {**entry, 'client_id': new_client_id}
+    if alert_engine is not None:
+        alert_engine.rename(old_client_id, new_client_id)
+
+def inference_ready():
+    if inference_pool is not None:
+        return CV2_AVAILABLE and inference_pool.ready_workers > 0
+    return CV2_AVAILABLE and face_detection_model is not None
+
+def not_ready_reason():
+    """frames_dropped label for a frame skipped because inference is not ready"""
+    if model_status['state'] == 'ready':
+        return 'worker_restarting'  # Every worker died and is loading its models again
+    return model_status['state']
+
+def inference_slot(client_id, room_id, priority):
+    """Wait for this room's fair share of inference; raises InferenceDropped"""
+    if inference_gate is None:
+        return nullcontext()
+    return inference_gate.slot(room_id, client_id, priority)
+
+def decode_frame(frame_data, stage_prefix=''):
+    """Decode a base64 data URL into a BGR frame; stage_prefix keeps small frames apart in the histograms"""
+    with time_stage(stage_prefix + 'base64_decode'):
+        frame_bytes = base64.b64decode(frame_data.split(',')[1])
+    with time_stage(stage_prefix + 'imdecode'):
+        np_arr = np.frombuffer(frame_bytes, np.uint8)
+        return cv2.imdecode(np_arr, cv2.IMREAD_COLOR)
+
+def client_pipeline(client_id):
+    """(EmotionPipeline, Lock) of a client, created on its first frame"""
+    with pipelines_lock:
+        entry = client_pipelines.get(client_id)
+        if entry is None:
+            # Detection happens through detect_faces(); the pipeline crops, tracks and analyzes
+            pipeline = EmotionPipeline(None, CONFIDENCE_THRESHOLD, CROP_PADDING,
+                                       MIN_FACE_SIZE, analyzer=analyze_crops)
+            entry = client_pipelines[client_id] = (pipeline, threading.Lock())
+        return entry
+
+def analyze_frame(client_id, frame, event):
+    """Detect every face and analyze all crops in one batched emotion pass"""
+    pipeline, lock = client_pipeline(client_id)
+    if inference_pool is not None:
+        faces = analyze_in_worker(pipeline, lock, frame)
+    else:
+        with time_stage('yolo'):
+            boxes = detect_faces(frame)
+        # Each Socket.IO event runs on its own thread; two frames of one client
+        # must not update its face tracks and emotion cache at once
+        with lock, time_stage('deepface'):
+            faces = pipeline.process(frame, boxes)
+    FACES_ANALYZED.inc(event, amount=len(faces))
+    return [face for face in faces if face['emotions']]
+
+def analyze_in_worker(pipeline, lock, frame):
+    """Hand the frame to an inference process through the shared frame arena"""
+    with time_stage('arena_write'):
+        job = inference_pool.submit(frame, WORKER_TIMEOUT)
+    try:
+        with time_stage('worker'):
+            faces = inference_pool.result(job, WORKER_TIMEOUT)
+    finally:
+        # The slot is freed once the worker has answered (right away unless the
+        # job timed out); the result holds plain Python values, never arena views
+        inference_pool.release(job)
+
+    # Tracking stays per client in this process
+    with lock:
+        track_ids = pipeline.tracker.update([face['bbox'] for face in faces])
+    for face, track_id in zip(faces, track_ids):
+        face['track_id'] = track_id
+    return faces
+
+def emit_result(event, faces, frame_id, client_info):
+    """Send analysis results in the encoding the client joined with"""
+    if client_info.get('encoding') == 'msgpack':
+        emit(event, codec.encode_faces(faces, frame_id))
+    else:
+        emit(event, build_result(faces, frame_id))
+
+def add_member(room_id, client_id, user_type, encoding):
+    with members_lock:
+        room_members.setdefault(room_id, {})[client_id] = (user_type, encoding)
+
+def remove_member(room_id, client_id):
+    with members_lock:
+        members = room_members.get(room_id)
+        if members is not None:
+            members.pop(client_id, None)
+            if not members:
+                del room_members[room_id]
+
+def members_of(room_id):
+    """[(sid, user_type, encoding)] of the clients in room_id"""
+    with members_lock:
+        return [(cid, user_type, encoding)
+                for cid, (user_type, encoding) in room_members.get(room_id, {}).items()]
+
+def binary_clients(room_id):
+    return [cid for cid, _, encoding in members_of(room_id) if encoding == 'msgpack']
+
+def hr_clients_by_encoding(room_id):
+    """Split the HR clients of a room into (json_sids, msgpack_sids)"""
+    json_sids, binary_sids = [], []
+    for cid, user_type, encoding in members_of(room_id):
+        if user_type == 'hr':
+            (binary_sids if encoding == 'msgpack' else json_sids).append(cid)
+    return json_sids, binary_sids
+
+def flush_emotion_batch(room_id, entries):
+    """Send one tick of employee updates to the room's HR clients"""
+    json_sids, binary_sids = hr_clients_by_encoding(room_id)
+    with time_stage('batch_emit'):
+        if json_sids:
+            socketio.emit('emotion_batch', {'room_id': room_id, 'updates': entries}, to=json_sids)
+        if binary_sids:
+            socketio.emit('emotion_batch', codec.encode_updates(entries, room_interner(room_id)), to=binary_sids)
+
+def send_alerts(room_id, emotion_entry, alerts):
+    """Push hr_alert events for one employee to the room's HR clients"""
+    json_sids, binary_sids = hr_clients_by_encoding(room_id)
+    hr_sids = json_sids + binary_sids  # Alerts are rare, so every client gets JSON
+    for alert in alerts:
+        alert.update({
+            'room_id': room_id,
+            'client_id': emotion_entry['client_id'],
+            'user_name': emotion_entry['user_name'],
+            'timestamp': emotion_entry['timestamp']
+        })
+        print(f"Alert {alert['rule']} for {alert['user_name']} in room {room_id}")
+        if hr_sids:
+            socketio.emit('hr_alert', alert, to=hr_sids)
+
+def send_presence(room_id, client_id, user_name, face_count):
+    """Tell the room's HR clients an employee arrived, left or the face count changed"""
+    json_sids, binary_sids = hr_clients_by_encoding(room_id)
+    if json_sids or binary_sids:
+        socketio.emit('presence_update', {
+            'client_id': client_id,
+            'user_name': user_name,
+            'present': face_count > 0,
+            'face_count': face_count,
+            'timestamp': datetime.now().isoformat()
+        }, to=json_sids + binary_sids)
+
+def room_interner(room_id):
+    with interners_lock:
+        interner = room_interners.get(room_id)
+        if interner is None:
+            interner = room_interners[room_id] = codec.ClientInterner()
+        return interner
+
+def forget_interned(room_id, client_id):
+    """Drop a client that left room_id from the room's msgpack client table"""
+    interner = room_interners.get(room_id)
+    if interner is not None:
+        interner.forget(client_id)
+
+def build_result(faces, frame_id):
+    """Result payload listing every face in the frame"""
+    first = faces[0]
+    return {
+        'faces': faces,
+        'face_count': len(faces),
+        'frame_id': frame_id,
+        # First face at the top level for clients that predate 'faces'
+        'emotions': first['emotions'],
+        'dominant_emotion': first['dominant_emotion'],
+        'bbox': first['bbox'],
+        'face_index': 0
+    }
 
 @app.route('/')
 def index():
@@ -52,9 +452,85 @@ def api_status():
     return jsonify({
         'status': 'running',
         'timestamp': datetime.now().isoformat(),
-        'connected_clients': len(connected_clients)
+        'connected_clients': len(connected_clients),
+        'startup_seconds': STARTUP_SECONDS,
+        'models': {
+            **model_status,
+            'import_seconds': dict(backends.import_times)
+        }
     })
 
+@app.route('/metrics')
+def metrics_endpoint():
+    """Prometheus scrape endpoint"""
+    return Response(metrics.registry.render(), mimetype=metrics.CONTENT_TYPE)
+
+def _is_admin():
+    """Check the X-Admin-Token header (or ?token=) against config.ADMIN_TOKEN"""
+    if not ADMIN_TOKEN:
+        return False
+    token = request.headers.get('X-Admin-Token') or request.args.get('token', '')
+    return hmac.compare_digest(token, ADMIN_TOKEN)
+
+def profile_status():
+    """profiler.status(), noting what the in-process sampler cannot see"""
+    status = profiler.status()
+    if inference_pool is not None:
+        # The sampler only sees this process's threads
+        status['not_profiled'] = f"inference in {INFERENCE_PROCESSES} worker process(es)"
+    return status
+
+@app.route('/admin/profile/start', methods=['POST'])
+def admin_profile_start():
+    """Start a sampling profile window (?duration=30&interval=0.005&tracemalloc=1)"""
+    if not _is_admin():
+        return jsonify({'error': 'forbidden'}), 403
+    try:
+        duration = float(request.args.get('duration', 30))
+        interval = float(request.args.get('interval', 0.005))
+    except ValueError:
+        return jsonify({'error': 'duration and interval must be numbers'}), 400
+    trace_memory = request.args.get('tracemalloc', '0') in ('1', 'true', 'yes')
+
+    if not profiler.start(duration, interval, trace_memory):
+        return jsonify({'error': 'profiling already active', **profile_status()}), 409
+    print(f"🔬 Profiling started for {duration:.0f}s")
+    return jsonify(profile_status())
+
+@app.route('/admin/profile/stop', methods=['POST'])
+def admin_profile_stop():
+    if not _is_admin():
+        return jsonify({'error': 'forbidden'}), 403
+    profiler.stop()
+    return jsonify(profile_status())
+
+@app.route('/admin/profile/status')
+def admin_profile_status():
+    if not _is_admin():
+        return jsonify({'error': 'forbidden'}), 403
+    return jsonify(profile_status())
+
+@app.route('/admin/profile/result')
+def admin_profile_result():
+    """Download collapsed stacks for flamegraph.pl / speedscope"""
+    if not _is_admin():
+        return jsonify({'error': 'forbidden'}), 403
+    stacks = profiler.collapsed_stacks()
+    if stacks is None:
+        return jsonify({'error': 'no finished profile', **profiler.status()}), 404
+    return Response(stacks, mimetype='text/plain',
+                    headers={'Content-Disposition': 'attachment; filename=emotion-server.collapsed'})
+
+@app.route('/admin/profile/memory')
+def admin_profile_memory():
+    """Download the tracemalloc top allocation sites of the last window"""
+    if not _is_admin():
+        return jsonify({'error': 'forbidden'}), 403
+    report = profiler.memory_report()
+    if report is None:
+        return jsonify({'error': 'no tracemalloc snapshot', **profiler.status()}), 404
+    return Response(report, mimetype='text/plain')
+
 @socketio.on('connect')
 def handle_connect():
     client_id = request.sid
@@ -68,56 +544,118 @@ def handle_disconnect():
         room = client_info.get('room')
         if room:
             leave_room(room)
+            remove_member(room, client_id)
+            forget_interned(room, client_id)
             # Notify others in the room
             emit('user_disconnected', {
                 'client_id': client_id,
                 'user_type': client_info.get('type')
             }, room=room, skip_sid=client_id)
         del connected_clients[client_id]
+        client_pipelines.pop(client_id, None)
+        if presence_board is not None:
+            presence_board.forget(client_id)
+        if client_keys.pop(client_id, None) is None and alert_engine is not None:
+            # Nobody can resume this client, so its alert window is dropped now
+            alert_engine.forget(client_id)
         print(f"👋 Client disconnected: {client_id}")
 
 @socketio.on('join_room')
 def handle_join_room(data):
+    global state_changes
     client_id = request.sid
     room_id = data.get('room_id')
     user_type = data.get('user_type')  # 'employee' or 'hr'
     user_name = data.get('user_name', f"User-{client_id[:6]}")
+    client_key = data.get('client_key')  # Stable id a client keeps across reconnects
+    previous = known_clients.get(client_key) if client_key else None
+    # Only a client of the same role whose old socket is gone can take over a key;
+    # otherwise a second tab or an HR page could claim a live employee's history
+    key_in_use = (previous is not None and previous['client_id'] != client_id
+                  and previous['client_id'] in connected_clients)
+    if previous is not None and (key_in_use or previous['type'] != user_type):
+        previous = None
+    if not room_id and previous:
+        room_id = previous['room']
+    encoding = data.get('encoding', 'json')
+    if encoding not in codec.ENCODINGS or (encoding == 'msgpack' and not codec.MSGPACK_AVAILABLE):
+        print(f"Server: {encoding} encoding unavailable for {client_id}, using json")
+        encoding = 'json'
 
     if not room_id:
         emit('error', {'message': 'Room ID is required'})
         return
 
+    current_room = connected_clients.get(client_id, {}).get('room')
+    if current_room and current_room != room_id:
+        # Switching rooms: stop receiving the old room's events
+        leave_room(current_room)
+        remove_member(current_room, client_id)
+        forget_interned(current_room, client_id)
+
     # Store client info
     connected_clients[client_id] = {
         'type': user_type,
         'room': room_id,
         'name': user_name,
-        'joined_at': datetime.now().isoformat()
+        'joined_at': datetime.now().isoformat(),
+        'encoding': encoding
     }
 
     join_room(room_id)
+    add_member(room_id, client_id, user_type, encoding)
 
     # Initialize emotion data for this room if not exists
     if room_id not in emotion_data:
         emotion_data[room_id] = []
 
+    # A returning client (reconnect or server restart) keeps its history
+    resumed = previous is not None and previous['room'] == room_id
+    if resumed and previous['client_id'] != client_id:
+        reassign_client(room_id, previous['client_id'], client_id)
+    if client_key and not key_in_use:
+        client_keys[client_id] = client_key
+        known_clients[client_key] = {
+            'room': room_id,
+            'type': user_type,
+            'name': user_name,
+            'client_id': client_id,
+            'last_seen': time.time()
+        }
+    state_changes += 1
+
     # Notify others in the room
-    emit('user_joined', {
+    joined = {
         'client_id': client_id,
         'user_name': user_name,
         'user_type': user_type,
         'timestamp': datetime.now().isoformat()
-    }, room=room_id, skip_sid=client_id)
+    }
+    if resumed:
+        joined['resumed'] = True
+        joined['previous_client_id'] = previous['client_id']
+    emit('user_joined', joined, room=room_id, skip_sid=client_id)
+
+    if resumed and user_type == 'employee':
+        # Employees only use room_status as a join ack, so a wave of
+        # reconnects does not rebuild the client list and history for each
+        emit('room_status', {'room_id': room_id, 'resumed': True})
+        print(f"User {user_name} ({user_type}) rejoined room: {room_id}")
+        return
 
     # Send current room status to the new client
-    room_clients = [info for cid, info in connected_clients.items()
-                   if info.get('room') == room_id]
+    room_clients = [{'client_id': cid, **info} for cid, info in connected_clients.items()
+                    if info.get('room') == room_id]
 
-    emit('room_status', {
-        'room_id': room_id,
-        'clients': room_clients,
-        'emotion_history': emotion_data[room_id][-50:]  # Last 50 entries
-    })
+    history = emotion_data[room_id][-50:]  # Last 50 entries
+    if encoding == 'msgpack':
+        emit('room_status', codec.encode_room_status(room_id, room_clients, history, room_interner(room_id)))
+    else:
+        emit('room_status', {
+            'room_id': room_id,
+            'clients': room_clients,
+            'emotion_history': history
+        })
 
     print(f"User {user_name} ({user_type}) joined room: {room_id}")
 
@@ -133,41 +671,72 @@ def handle_hr_emotion_frame(data):
 
     frame_data = data.get('frame')
     frame_count = data.get('frame_count', 0)
+    FRAMES_RECEIVED.inc('hr_emotion_frame')
 
-    if not frame_data or not face_detection_model or not CV2_AVAILABLE:
+    if not frame_data:
+        FRAMES_DROPPED.inc('hr_emotion_frame', 'empty')
+        return
+    if not inference_ready():
+        FRAMES_DROPPED.inc('hr_emotion_frame', not_ready_reason())
         return
 
     try:
-        # Decode base64 frame
-        frame_bytes = base64.b64decode(frame_data.split(',')[1])
-        np_arr = np.frombuffer(frame_bytes, np.uint8)
-        frame = cv2.imdecode(np_arr, cv2.IMREAD_COLOR)
-
-        # Detect faces
-        results = face_detection_model(frame, verbose=False, conf=CONFIDENCE_THRESHOLD)
-
-        for result_idx, result in enumerate(results):
-            for box_idx, box in enumerate(result.boxes.xyxy):
-                x1, y1, x2, y2 = map(int, box)
-
-                # Extract face
-                face = frame[y1:y2, x1:x2]
-                if face.size > 0:
-                    emotions, dominant = analyze_emotion(face)
-                    if emotions:
-                        # Send back emotion data with bbox
-                        emit('hr_emotion_result', {
-                            'emotions': emotions,
-                            'dominant_emotion': dominant,
-                            'bbox': [x1, y1, x2, y2],
-                            'face_index': box_idx
-                        })
-                        break  # Process only first face for HR
+        # Live HR requests go ahead of periodic employee frames
+        with inference_slot(client_id, client_info.get('room'), 'interactive'):
+            frame = decode_frame(frame_data)
+            faces = analyze_frame(client_id, frame, 'hr_emotion_frame')
+        if faces:
+            # Send back every face with its bbox
+            with time_stage('emit'):
+                emit_result('hr_emotion_result', faces, data.get('frame_id'), client_info)
+        FRAMES_PROCESSED.inc('hr_emotion_frame')
+    except InferenceDropped as e:
+        FRAMES_DROPPED.inc('hr_emotion_frame', e.reason)
+    except ArenaFullError:
+        FRAMES_DROPPED.inc('hr_emotion_frame', 'arena_full')
+    except WorkerUnavailable as e:
+        FRAMES_DROPPED.inc('hr_emotion_frame', e.reason)
     except Exception as e:
+        PROCESSING_ERRORS.inc('hr_emotion_frame')
         print(f"HR emotion processing error: {e}")
 
+@socketio.on('presence_frame')
+def handle_presence_frame(data):
+    """Face present/absent/count from a small employee frame; no emotion analysis"""
+    client_id = request.sid
+    if client_id not in connected_clients:
+        return
+
+    client_info = connected_clients[client_id]
+    room_id = client_info.get('room')
+    if not room_id or client_info.get('type') != 'employee':
+        return
+
+    frame_data = data.get('frame')
+    FRAMES_RECEIVED.inc('presence_frame')
+    now = time.time()
+    if not frame_data:
+        FRAMES_DROPPED.inc('presence_frame', 'empty')
+        return
+    if presence_detector is None:
+        FRAMES_DROPPED.inc('presence_frame', 'disabled' if presence_board is None else model_status['state'])
+        return
+    if not presence_board.should_check(client_id, now):
+        FRAMES_DROPPED.inc('presence_frame', 'rate_limited')
+        return
+
+    try:
+        face_count = count_faces(presence_detector, decode_frame(frame_data, 'presence_'))
+        if presence_board.update(client_id, face_count, now):
+            send_presence(room_id, client_id, client_info.get('name'), face_count)
+        FRAMES_PROCESSED.inc('presence_frame')
+    except Exception as e:
+        PROCESSING_ERRORS.inc('presence_frame')
+        print(f"Presence processing error: {e}")
+
 @socketio.on('emotion_update')
 def handle_emotion_update(data):
+    global state_changes
     client_id = request.sid
     if client_id not in connected_clients:
         return
@@ -194,9 +763,25 @@ def handle_emotion_update(data):
         emotion_data[room_id] = []
     emotion_data[room_id].append(emotion_entry)
     emotion_data[room_id] = emotion_data[room_id][-100:]
+    state_changes += 1
+
+    if alert_engine is not None:
+        alerts = alert_engine.update(client_id, time.time(), emotion_entry['emotions'],
+                                     emotion_entry['dominant_emotion'], emotion_entry['face_detected'])
+        if alerts:
+            send_alerts(room_id, emotion_entry, alerts)
+
+    if emit_batcher is not None:
+        # Sent to HR clients with the room's next emotion_batch
+        emit_batcher.add(room_id, client_id, emotion_entry)
+        return
 
-    # Broadcast to HR clients in the same room
-    emit('emotion_update', emotion_entry, room=room_id, skip_sid=client_id)
+    # Broadcast to HR clients in the same room; msgpack clients get the compact form
+    binary = binary_clients(room_id)
+    emit('emotion_update', emotion_entry, room=room_id, skip_sid=[client_id, *binary])
+    binary = [sid for sid in binary if sid != client_id]
+    if binary:
+        emit('emotion_update', codec.encode_updates([emotion_entry], room_interner(room_id)), room=binary)
 
 @socketio.on('video_frame')
 def handle_video_frame(data):
@@ -214,43 +799,40 @@ def handle_video_frame(data):
     frame_data = data.get('frame')
     process_server_side = data.get('process_server', False)
 
-    if process_server_side and frame_data and face_detection_model and CV2_AVAILABLE:
+    FRAMES_RECEIVED.inc('video_frame')
+    if not (process_server_side and frame_data):
+        FRAMES_DROPPED.inc('video_frame', 'not_requested')
+    elif not inference_ready():
+        FRAMES_DROPPED.inc('video_frame', not_ready_reason())
+    else:
         try:
-            # Decode base64 frame
-            frame_bytes = base64.b64decode(frame_data.split(',')[1])
-            np_arr = np.frombuffer(frame_bytes, np.uint8)
-            frame = cv2.imdecode(np_arr, cv2.IMREAD_COLOR)
-
-            # Detect faces
-            results = face_detection_model(frame, verbose=False, conf=CONFIDENCE_THRESHOLD)
-
-            for result in results:
-                for box in result.boxes.xyxy:
-                    x1, y1, x2, y2 = map(int, box)
-
-                    # Extract face
-                    face = frame[y1:y2, x1:x2]
-                    if face.size > 0:
-                        emotions, dominant = analyze_emotion(face)
-                        if emotions:
-                            # Send back emotion data
-                            emit('server_emotion_result', {
-                                'emotions': emotions,
-                                'dominant_emotion': dominant,
-                                'bbox': [x1, y1, x2, y2]
-                            })
-                            break
+            with inference_slot(client_id, room_id, 'background'):
+                frame = decode_frame(frame_data)
+                faces = analyze_frame(client_id, frame, 'video_frame')
+            if faces:
+                # Send back emotion data
+                with time_stage('emit'):
+                    emit_result('server_emotion_result', faces, data.get('frame_id'), client_info)
+            FRAMES_PROCESSED.inc('video_frame')
+        except InferenceDropped as e:
+            FRAMES_DROPPED.inc('video_frame', e.reason)
+        except ArenaFullError:
+            FRAMES_DROPPED.inc('video_frame', 'arena_full')
+        except WorkerUnavailable as e:
+            FRAMES_DROPPED.inc('video_frame', e.reason)
         except Exception as e:
+            PROCESSING_ERRORS.inc('video_frame')
             print(f"Server-side processing error: {e}")
 
     # Broadcast frame to HR clients (for monitoring)
     if client_info.get('type') == 'employee':
-        emit('employee_frame', {
-            'client_id': client_id,
-            'user_name': client_info.get('name'),
-            'frame': frame_data,
-            'timestamp': datetime.now().isoformat()
-        }, room=room_id, skip_sid=client_id)
+        with time_stage('relay_emit'):
+            emit('employee_frame', {
+                'client_id': client_id,
+                'user_name': client_info.get('name'),
+                'frame': frame_data,
+                'timestamp': datetime.now().isoformat()
+            }, room=room_id, skip_sid=client_id)
 
 @socketio.on('hr_command')
 def handle_hr_command(data):
@@ -299,6 +881,8 @@ def handle_get_room_stats():
                    if info.get('room') == room_id]
 
     employees = [c for c in room_clients if c['type'] == 'employee']
+    employee_ids = [cid for cid, info in list(connected_clients.items())
+                    if info.get('room') == room_id and info.get('type') == 'employee']
     hrs = [c for c in room_clients if c['type'] == 'hr']
 
     # Calculate emotion statistics
@@ -322,6 +906,8 @@ def handle_get_room_stats():
         'room_id': room_id,
         'most_common_emotion': most_common_emotion[0],
         'emotion_distribution': emotion_counts if 'emotion_counts' in locals() else {},
+        # Employees at their desk per the presence fast path (unknown = no recent presence_frame)
+        'presence': presence_board.summary(employee_ids, time.time()) if presence_board is not None else None,
         'timestamp': datetime.now().isoformat()
     }
 
@@ -339,30 +925,88 @@ def cleanup_old_data():
             ]
             if not emotion_data[room_id]:
                 del emotion_data[room_id]
+        # Forget returning-client rooms after MAX_DATA_AGE
+        for client_key, info in list(known_clients.items()):
+            if time.time() - info['last_seen'] > MAX_DATA_AGE:
+                del known_clients[client_key]
+                if alert_engine is not None and info['client_id'] not in connected_clients:
+                    alert_engine.forget(info['client_id'])
+
+        # Forget msgpack client ids of rooms nobody is connected to
+        active_rooms = {info.get('room') for info in list(connected_clients.values())}
+        with interners_lock:
+            for room_id in list(room_interners):
+                if room_id not in active_rooms:
+                    del room_interners[room_id]
+        if inference_gate is not None:
+            inference_gate.prune(active_rooms)
 
         time.sleep(300)  # Clean up every 5 minutes
 
-if __name__ == '__main__':
-    # Initialize models
-    init_models()
+inference_gate = None
+if FAIR_SCHEDULING_ENABLED:
+    # Enough slots to fill a detection batch in every inference process
+    slots = INFERENCE_SLOTS or DETECT_BATCH_SIZE * max(1, INFERENCE_PROCESSES)
+    if INFERENCE_PROCESSES > 0:
+        slots = min(slots, FRAME_ARENA_SLOTS)
+    inference_gate = FairScheduler(slots, FAIR_MAX_WAIT, ROOM_QUOTAS, ROOM_QUOTA_DEFAULT)
+    metrics.registry.gauge('emotion_fair_queue_depth', 'Frames waiting for an inference slot',
+                           ('room', 'class'), callback=inference_gate.waiting)
+    metrics.registry.gauge('emotion_fair_in_flight', 'Frames being analyzed per room',
+                           ('room',), callback=inference_gate.in_flight)
+
+emit_batcher = None
+if FANOUT_INTERVAL_MS > 0:
+    emit_batcher = RoomEmitBatcher(flush_emotion_batch, FANOUT_INTERVAL_MS / 1000.0)
+    metrics.register_queue_depth('fanout', emit_batcher.pending)
+
+alert_engine = None
+if ALERTS_ENABLED and ALERT_RULES:
+    alert_engine = AlertEngine(ALERT_RULES, ALERT_WINDOW_SECONDS, ALERT_EMA_SECONDS, ALERT_COOLDOWN)
+    metrics.registry.gauge('emotion_alert_tracked_employees', 'Employees with a live alert window',
+                           callback=lambda: {(): len(alert_engine)})
+
+def _presence_per_room():
+    now = time.time()
+    employees = {}
+    for cid, info in list(connected_clients.items()):
+        if info.get('type') == 'employee':
+            employees.setdefault(info.get('room'), []).append(cid)
+    return {(room_id, state): count
+            for room_id, client_ids in employees.items()
+            for state, count in presence_board.summary(client_ids, now).items() if state != 'faces'}
+
+presence_board = None
+if PRESENCE_ENABLED:
+    presence_board = PresenceBoard(PRESENCE_MIN_INTERVAL_MS / 1000.0, PRESENCE_MAX_AGE)
+    metrics.registry.gauge('emotion_presence_employees', 'Employees per room by presence state',
+                           ('room', 'state'), callback=_presence_per_room)
+
+snapshot_writer = None
+if SNAPSHOT_INTERVAL > 0:
+    snapshot_writer = SnapshotWriter(SNAPSHOT_PATH, SNAPSHOT_INTERVAL, collect_state, lambda: state_changes)
+
+# Time to import the web/Socket.IO layer (the vision stack is not included)
+STARTUP_SECONDS = time.perf_counter() - _import_started
+print(f"Server: Web layer ready in {STARTUP_SECONDS:.2f}s")
 
-    # Start cleanup thread
-    cleanup_thread = threading.Thread(target=cleanup_old_data, daemon=True)
-    cleanup_thread.start()
+if __name__ == '__main__':
+    # Load models and start cleanup in the background
+    start_background_services()
 
     print("Starting Emotion HR Server...")
     print("WebSocket server ready for real-time emotion monitoring")
     print("=" * 60)
     print("Server URLs:")
-    print("   Main Page:     http://0.0.0.0:5000")
-    print("   Employee View: http://0.0.0.0:5000/employee")
-    print("   HR Dashboard:  http://0.0.0.0:5000/hr")
-    print("   API Status:    http://0.0.0.0:5000/api/status")
+    print(f"   Main Page:     http://{SERVER_HOST}:{SERVER_PORT}")
+    print(f"   Employee View: http://{SERVER_HOST}:{SERVER_PORT}/employee")
+    print(f"   HR Dashboard:  http://{SERVER_HOST}:{SERVER_PORT}/hr")
+    print(f"   API Status:    http://{SERVER_HOST}:{SERVER_PORT}/api/status")
     print("=" * 60)
     print("Network Configuration:")
-    print("   - Make sure port 5000 is open in firewall")
+    print(f"   - Make sure port {SERVER_PORT} is open in firewall")
     print("   - Note your server's IP address for clients")
-    print("   - Clients will connect using: http://[SERVER-IP]:5000")
+    print(f"   - Clients will connect using: http://[SERVER-IP]:{SERVER_PORT}")
     print("=" * 60)
 
-    socketio.run(app, host='0.0.0.0', port=5000, debug=False, allow_unsafe_werkzeug=True)
\ No newline at end of file
+    socketio.run(app, host=SERVER_HOST, port=SERVER_PORT, debug=False, allow_unsafe_werkzeug=True)
@@ -0,0 +1,84 @@
+"""
+Periodic snapshots of live room state for fast restarts.
+A background thread packs the state returned by collect() with MessagePack
+and writes it atomically (temp file + os.replace), so a crash mid-write
+leaves the previous snapshot intact. The server restores it on startup.
+"""
+
+import atexit
+import os
+import threading
+import time
+
+import metrics
+from codec import msgpack, MSGPACK_AVAILABLE
+
+SNAPSHOT_VERSION = 1
+
+
+def write_snapshot(path, state):
+    """Atomically replace path with the packed state"""
+    data = msgpack.packb({'version': SNAPSHOT_VERSION, 'saved_at': time.time(), **state})
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    return len(data)
+
+
+def read_snapshot(path):
+    """Return the saved state dict, or None when missing or unreadable"""
+    if not MSGPACK_AVAILABLE or not os.path.exists(path):
+        return None
+    try:
+        with open(path, 'rb') as f:
+            state = msgpack.unpackb(f.read(), strict_map_key=False)
+    except Exception as e:
+        print(f"Snapshot: Could not read {path}: {e}")
+        return None
+    if state.get('version') != SNAPSHOT_VERSION:
+        print(f"Snapshot: Ignoring {path} (version {state.get('version')})")
+        return None
+    return state
+
+
+class SnapshotWriter:
+    """Writes collect() to path every interval seconds when version() changed"""
+
+    def __init__(self, path, interval, collect, version):
+        self.path = path
+        self.interval = interval
+        self.collect = collect
+        self.version = version
+        self._written_version = None
+        self._thread = None
+
+    def start(self):
+        if not MSGPACK_AVAILABLE:
+            print("Snapshot: msgpack is not installed, room state will not be saved")
+            return
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='snapshot', daemon=True)
+            self._thread.start()
+            atexit.register(self.save)  # Final snapshot on a clean shutdown
+
+    def save(self):
+        """Write a snapshot now if anything changed since the last one"""
+        version = self.version()
+        if version == self._written_version:
+            return False
+        try:
+            with metrics.time_stage('snapshot'):
+                write_snapshot(self.path, self.collect())
+        except Exception as e:
+            print(f"Snapshot: Failed to write {self.path}: {e}")
+            return False
+        self._written_version = version
+        return True
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            self.save()
@@ -0,0 +1,72 @@
+"""
+Stub inference backend for load tests and benchmarks.
+Stands in for YOLO + DeepFace so the server and pipeline can be exercised
+on machines without model weights, TensorFlow or a GPU.
+"""
+
+EMOTION_NAMES = ('angry', 'disgust', 'fear', 'happy', 'sad', 'surprise', 'neutral')
+
+
+class _StubBoxes:
+    def __init__(self, xyxy):
+        self.xyxy = xyxy
+
+
+class _StubResult:
+    def __init__(self, xyxy):
+        self.boxes = _StubBoxes(xyxy)
+
+
+class StubFaceDetector:
+    """Mimics an ultralytics YOLO model.
+
+    Frames registered with register() return their known boxes; any other
+    frame returns num_faces boxes laid out across the frame.
+    """
+
+    def __init__(self, num_faces=1):
+        self.num_faces = num_faces
+        self.boxes_by_frame = {}
+
+    def register(self, frame, boxes):
+        self.boxes_by_frame[id(frame)] = boxes
+
+    def __call__(self, frame, verbose=False, conf=0.5, **kwargs):
+        if isinstance(frame, list):
+            # Batched call: one result per frame, like ultralytics
+            return [self(f, verbose, conf, **kwargs)[0] for f in frame]
+        boxes = self.boxes_by_frame.get(id(frame))
+        if boxes is None:
+            boxes = self._grid_boxes(frame.shape[1], frame.shape[0])
+        return [_StubResult(boxes)]
+
+    def _grid_boxes(self, width, height):
+        if self.num_faces <= 0:
+            return []
+        cell_w = width // self.num_faces
+        size = min(cell_w, height) // 2
+        top = (height - size) // 2
+        return [[i * cell_w + (cell_w - size) // 2, top,
+                 i * cell_w + (cell_w + size) // 2, top + size]
+                for i in range(self.num_faces)]
+
+
+def stub_analyze_emotion(face_img):
+    """Cheap deterministic stand-in for DeepFace that still touches the pixels"""
+    return _stub_result(float(face_img.mean()))
+
+
+def _stub_result(level):
+    emotions = {name: 0.0 for name in EMOTION_NAMES}
+    dominant = EMOTION_NAMES[int(level) % len(EMOTION_NAMES)]
+    emotions[dominant] = 100.0
+    return emotions, dominant
+
+
+def stub_analyze_emotions(face_imgs):
+    """Batched counterpart of stub_analyze_emotion"""
+    if hasattr(face_imgs, 'batch'):
+        # FaceCrops: go through the same vectorized preprocessing as the real model
+        levels = face_imgs.batch().mean(axis=(1, 2)) * 255.0
+        return [_stub_result(level) for level in levels.tolist()]
+    return [stub_analyze_emotion(face) for face in face_imgs]
@@ -0,0 +1,13 @@
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'emotion_server'))
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+
+# Stub models, and no snapshot restored from or written to the source tree
+os.environ.setdefault('EMOTION_STUB_INFERENCE', '1')
+os.environ.setdefault('EMOTION_INFERENCE_PROCESSES', '0')
+os.environ.setdefault('EMOTION_SNAPSHOT_PATH', os.path.join(tempfile.mkdtemp(), 'emotion_state.snapshot'))
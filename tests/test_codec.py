@@ -0,0 +1,32 @@
+import threading
+
+import pytest
+
+codec = pytest.importorskip('codec')
+
+
+def test_concurrent_interning_gives_unique_indices():
+    interner = codec.ClientInterner()
+    barrier = threading.Barrier(8)
+
+    def intern_many(thread):
+        barrier.wait()
+        for i in range(200):
+            interner.intern(f'{thread}-{i}', None)
+
+    threads = [threading.Thread(target=intern_many, args=(t,)) for t in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(set(interner.ids.values())) == len(interner.ids) == 1600
+
+
+def test_forgotten_clients_leave_the_table_and_indices_are_not_reused():
+    room_a, room_b = codec.ClientInterner(), codec.ClientInterner()
+    first, _ = room_a.intern('sid-1', 'Ann')
+    room_a.forget('sid-1')
+    assert room_a.table() == {}
+    second, is_new = room_a.intern('sid-1', 'Ann')
+    other, _ = room_b.intern('sid-2', 'Bob')
+    assert is_new and len({first, second, other}) == 3
@@ -0,0 +1,31 @@
+import threading
+import time
+
+from fairness import FairScheduler
+
+
+def test_bursty_room_gets_only_its_weighted_share():
+    scheduler = FairScheduler(1, max_wait=10, quotas={'busy': {'weight': 2.0}, 'bursty': {'weight': 1.0}})
+    served = []
+    done = threading.Event()
+
+    def client(room_id, client_id):
+        # Acquire again as soon as the previous frame is done: 'busy' has four
+        # clients so its queue never empties, 'bursty' has one so it empties
+        # after every frame
+        while not done.is_set():
+            with scheduler.slot(room_id, client_id, 'background'):
+                served.append(room_id)
+                if len(served) >= 150:
+                    done.set()
+                time.sleep(0.002)
+
+    threads = [threading.Thread(target=client, args=('busy', f'busy-{i}')) for i in range(4)]
+    threads.append(threading.Thread(target=client, args=('bursty', 'bursty-0')))
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(20)
+
+    share = served[:150].count('bursty') / 150
+    assert 0.25 <= share <= 0.4  # Weight 1 of 3
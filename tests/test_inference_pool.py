@@ -0,0 +1,32 @@
+import os
+import subprocess
+import sys
+import textwrap
+
+from conftest import ROOT
+
+SCRIPT = textwrap.dedent("""
+    import sys
+    sys.path[:0] = [{server!r}, {root!r}]
+    print('main script ran', flush=True)
+
+    if __name__ == '__main__':
+        import numpy as np
+        from inference_pool import InferencePool
+        pool = InferencePool(2, {{'stub': True, 'confidence': 0.5, 'imgsz': 640, 'pad': 10, 'min_size': 20}},
+                             slot_count=4, max_shape=(240, 320, 3))
+        assert pool.wait_ready(60)
+        job = pool.submit(np.zeros((240, 320, 3), np.uint8), 5)
+        print('faces', len(pool.result(job, 30)), flush=True)
+        pool.release(job)
+        pool.close()
+""")
+
+
+def test_workers_do_not_rerun_the_main_script(tmp_path):
+    script = tmp_path / 'main_script.py'
+    script.write_text(SCRIPT.format(server=os.path.join(ROOT, 'emotion_server'), root=ROOT))
+    output = subprocess.run([sys.executable, str(script)], capture_output=True, text=True,
+                            timeout=120, cwd=tmp_path).stdout
+    assert output.count('main script ran') == 1
+    assert 'faces 1' in output
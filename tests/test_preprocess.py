@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+
+from frames import make_frame_set
+from stub_backend import _StubResult
+from vision_core.pipeline import boxes_from_results, crop_faces
+
+cv2 = pytest.importorskip('cv2')
+
+
+def cv2_batch(crops):
+    """The per-crop path the vectorized preprocessing replaces"""
+    return np.array([cv2.resize(cv2.cvtColor(crop, cv2.COLOR_BGR2GRAY), (48, 48),
+                                interpolation=cv2.INTER_AREA) / 255.0 for crop in crops])
+
+
+@pytest.mark.parametrize('name, frame, boxes', [case for case in make_frame_set(seed=0) if case[2]])
+def test_batch_matches_cv2_inter_area(name, frame, boxes):
+    _, crops = crop_faces(frame, boxes)
+    deviation = np.abs(crops.batch() - cv2_batch(list(crops)))
+    # cv2 rounds to uint8 twice (gray, then resized), so 2/255 is the floor
+    assert deviation.mean() < 0.002
+    assert deviation.max() < 0.008
+
+
+@pytest.mark.parametrize('size', [20, 33, 47, 48, 49, 97, 300])
+def test_small_and_large_crops_match_cv2(size):
+    frame = np.random.default_rng(size).integers(0, 256, (400, 400, 3), dtype=np.uint8)
+    _, crops = crop_faces(frame, [[30, 40, 30 + size, 40 + size]], pad=0, min_size=1)
+    assert np.abs(crops.batch() - cv2_batch(list(crops))).max() < 0.008
+
+
+class _Tensor:
+    """Minimal stand-in for a torch tensor on a device"""
+
+    def __init__(self, values):
+        self.values = np.asarray(values, dtype=np.float32)
+
+    def __len__(self):
+        return len(self.values)
+
+    def cpu(self):
+        return self
+
+    def numpy(self):
+        return self.values
+
+
+def test_boxes_from_results_is_one_int_array():
+    results = [_StubResult(_Tensor([[1.7, 2.2, 30.9, 40.1]])), _StubResult(_Tensor(np.empty((0, 4)))),
+               _StubResult([[5, 6, 7, 8]])]
+    boxes = boxes_from_results(results)
+    assert boxes.dtype == np.int64
+    assert boxes.tolist() == [[1, 2, 30, 40], [5, 6, 7, 8]]
+    assert boxes_from_results([]).shape == (0, 4)
@@ -0,0 +1,34 @@
+import threading
+
+from presence import DetectorPool
+
+
+class BlockingDetector:
+    name = 'blocking'
+
+    def __init__(self, started, release):
+        self.started = started
+        self.release = release
+
+    def __call__(self, frame):
+        self.started.release()
+        assert self.release.wait(5)
+        return 1
+
+
+def test_pool_runs_one_check_per_instance_at_once():
+    started, release = threading.Semaphore(0), threading.Event()
+    pool = DetectorPool([BlockingDetector(started, release) for _ in range(2)])
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(pool(None))) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+
+    # Two checks run together; the third waits for an idle instance
+    assert started.acquire(timeout=5) and started.acquire(timeout=5)
+    assert not started.acquire(timeout=0.1)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    assert results == [1, 1, 1]
+    assert pool.name == 'blocking' and pool.size == 2
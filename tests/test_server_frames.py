@@ -0,0 +1,45 @@
+import threading
+import time
+
+import pytest
+
+server = pytest.importorskip('server')
+from fairness import FairScheduler
+from load_test import make_sample_jpeg
+
+
+@pytest.fixture(scope='module', autouse=True)
+def models():
+    server.init_models()
+    assert server.inference_ready()
+
+
+def wait_until(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def test_newer_frame_of_a_client_supersedes_its_queued_frame(monkeypatch):
+    gate = FairScheduler(1, max_wait=5)
+    monkeypatch.setattr(server, 'inference_gate', gate)
+    hr = server.socketio.test_client(server.app)
+    hr.emit('join_room', {'room_id': 'frames', 'user_type': 'hr'})
+    hr.get_received()
+    frame = make_sample_jpeg(320, 240, 1)
+
+    gate.acquire('other-room', 'other-client', 'interactive')  # Hold the only slot
+    older = threading.Thread(target=hr.emit, args=('hr_emotion_frame', {'frame': frame, 'frame_id': 'older'}))
+    older.start()
+    wait_until(lambda: gate.waiting())
+    newer = threading.Thread(target=hr.emit, args=('hr_emotion_frame', {'frame': frame, 'frame_id': 'newer'}))
+    newer.start()
+    older.join(5)
+    gate.release('other-room')
+    newer.join(5)
+
+    results = [message['args'][0]['frame_id'] for message in hr.get_received()
+               if message['name'] == 'hr_emotion_result']
+    assert results == ['newer']
+    hr.disconnect()
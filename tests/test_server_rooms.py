@@ -0,0 +1,58 @@
+import pytest
+
+server = pytest.importorskip('server')
+codec = server.codec
+
+
+def join(room_id, user_type, **extra):
+    client = server.socketio.test_client(server.app)
+    client.emit('join_room', {'room_id': room_id, 'user_type': user_type, **extra})
+    return client
+
+
+def sid(client):
+    """The Socket.IO sid (request.sid) of a test client"""
+    return server.socketio.server.manager.sid_from_eio_sid(client.eio_sid, '/')
+
+
+def interned(room_id):
+    return {client_id for client_id, _ in server.room_interner(room_id).table().values()}
+
+
+@pytest.mark.skipif(not codec.MSGPACK_AVAILABLE, reason="msgpack not installed")
+def test_departed_clients_are_dropped_from_the_room_table():
+    employee = join('interner', 'employee', user_name='Ann')
+    employee_id = sid(employee)
+    employee.emit('emotion_update', {'emotions': {'happy': 90.0}, 'dominant_emotion': 'happy', 'face_detected': True})
+    hr = join('interner', 'hr', encoding='msgpack')
+    assert employee_id in interned('interner')
+
+    employee.disconnect()
+    assert employee_id not in interned('interner')
+    hr.disconnect()
+
+
+def test_switching_rooms_forgets_the_old_room():
+    client = join('room-a', 'employee')
+    client_id = sid(client)
+    server.room_interner('room-a').intern(client_id, None)
+    client.emit('join_room', {'room_id': 'room-b', 'user_type': 'employee'})
+    assert client_id not in interned('room-a')
+    assert server.connected_clients[client_id]['room'] == 'room-b'
+    client.disconnect()
+
+
+def test_hr_fanout_index_follows_joins_switches_and_disconnects():
+    hr = join('fanout-a', 'hr', encoding='msgpack' if codec.MSGPACK_AVAILABLE else 'json')
+    viewer = join('fanout-a', 'hr')
+    employee = join('fanout-a', 'employee')
+    json_sids, binary_sids = server.hr_clients_by_encoding('fanout-a')
+    assert sorted(json_sids + binary_sids) == sorted([sid(hr), sid(viewer)])
+
+    viewer.emit('join_room', {'room_id': 'fanout-b', 'user_type': 'hr'})
+    assert server.hr_clients_by_encoding('fanout-b') == ([sid(viewer)], [])
+    hr.disconnect()
+    assert server.hr_clients_by_encoding('fanout-a') == ([], [])
+    viewer.disconnect()
+    employee.disconnect()
+    assert 'fanout-a' not in server.room_members and 'fanout-b' not in server.room_members
@@ -0,0 +1,18 @@
+"""
+Shared vision core for the Emotion HR system.
+Face detection, cropping, tracking, batched emotion analysis and overlay
+rendering used by both emotion_recognition/emotion_track.py and
+emotion_server/.
+
+Importing this package is cheap: OpenCV, ultralytics and DeepFace are only
+imported when first used (see backends.py).
+"""
+
+from . import backends
+from .emotion import EMOTION_LABELS, analyze_emotion, analyze_emotions, warm_up
+from .preprocess import EMOTION_INPUT_SIZE, BatchBuffer, FaceCrops, crop_regions
+from .pipeline import (CROP_PADDING, MIN_FACE_SIZE, boxes_from_results, crop_faces,
+                       FaceTracker, EmotionPipeline)
+from .rendering import (EMOTION_COLORS, EMOTION_EMOJIS, draw_fancy_box, draw_label_box,
+                        draw_emotion_bar, draw_faces)
+from .webcam import run_webcam_demo
@@ -0,0 +1,68 @@
+"""
+Optional computer vision dependencies, imported lazily.
+OpenCV, ultralytics and DeepFace (which pulls in TensorFlow) are only
+imported the first time they are used, so processes that never run
+inference never pay for them. Access them as module attributes:
+
+    from vision_core import backends
+    if backends.CV2_AVAILABLE:
+        backends.cv2.imdecode(...)
+
+Import failures (missing packages, NumPy/OpenCV version mismatches) leave
+the attribute as None and the matching *_AVAILABLE flag False.
+"""
+
+import importlib
+import threading
+import time
+
+import numpy as np
+
+# attribute -> (module to import, attribute of that module or None)
+_LIBRARIES = {
+    'cv2': ('cv2', None),
+    'YOLO': ('ultralytics', 'YOLO'),
+    'DeepFace': ('deepface', 'DeepFace'),
+}
+
+_FLAGS = {
+    'CV2_AVAILABLE': 'cv2',
+    'YOLO_AVAILABLE': 'YOLO',
+    'DEEPFACE_AVAILABLE': 'DeepFace',
+}
+
+_lock = threading.RLock()
+_loaded = {}
+
+# attribute -> seconds spent importing it
+import_times = {}
+
+def load(name):
+    """Import a backend on first use and return it (None if unavailable)"""
+    if name in _loaded:
+        return _loaded[name]
+
+    with _lock:
+        if name not in _loaded:
+            module_name, attr = _LIBRARIES[name]
+            start = time.perf_counter()
+            try:
+                module = importlib.import_module(module_name)
+                value = getattr(module, attr) if attr else module
+            except Exception as e:
+                print(f"Vision core: {module_name} unavailable: {e}")
+                value = None
+            import_times[name] = time.perf_counter() - start
+            _loaded[name] = value
+    return _loaded[name]
+
+def is_loaded(name):
+    """True once load(name) has been attempted"""
+    return name in _loaded
+
+def __getattr__(attr):
+    if attr in _LIBRARIES:
+        return load(attr)
+    if attr in _FLAGS:
+        return load(_FLAGS[attr]) is not None
+    raise AttributeError(f"module {__name__!r} has no attribute {attr!r}")
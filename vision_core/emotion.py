@@ -0,0 +1,124 @@
+"""
+Emotion analysis on face crops.
+analyze_emotions() runs every crop of a frame through the DeepFace emotion
+classifier in one batched predict call, falling back to per-crop
+DeepFace.analyze() when the classifier cannot be loaded directly.
+"""
+
+import threading
+
+from . import backends
+from .backends import np
+from .preprocess import EMOTION_INPUT_SIZE
+
+# Output order of the DeepFace emotion classifier
+EMOTION_LABELS = ('angry', 'disgust', 'fear', 'happy', 'sad', 'surprise', 'neutral')
+
+_model_lock = threading.Lock()
+_emotion_model = None
+_batch_unavailable = False
+
+def analyze_emotion(face_img):
+    """Analyze emotion using DeepFace"""
+    if not backends.CV2_AVAILABLE or not backends.DEEPFACE_AVAILABLE:
+        return None, None
+
+    try:
+        # DeepFace expects BGR image
+        result = backends.DeepFace.analyze(
+            face_img,
+            actions=['emotion'],
+            enforce_detection=False,
+            silent=True
+        )
+
+        if isinstance(result, list):
+            result = result[0]
+
+        emotions = result.get('emotion', {})
+        dominant = result.get('dominant_emotion', 'neutral')
+
+        return emotions, dominant
+    except Exception as e:
+        return None, None
+
+def _load_emotion_model():
+    """Return the Keras emotion classifier behind DeepFace, or None"""
+    global _emotion_model, _batch_unavailable
+    if _emotion_model is not None or _batch_unavailable:
+        return _emotion_model
+
+    with _model_lock:
+        if _emotion_model is None and not _batch_unavailable:
+            try:
+                DeepFace = backends.DeepFace
+                try:
+                    client = DeepFace.build_model(task="facial_attribute", model_name="Emotion")
+                except TypeError:
+                    # DeepFace < 0.0.93 has no task argument
+                    client = DeepFace.build_model("Emotion")
+                model = getattr(client, 'model', client)
+                if not hasattr(model, 'predict'):
+                    raise TypeError("emotion model has no predict()")
+                _emotion_model = model
+            except Exception as e:
+                print(f"Batched emotion model unavailable, using DeepFace.analyze: {e}")
+                _batch_unavailable = True
+    return _emotion_model
+
+def warm_up():
+    """Import DeepFace and build the emotion classifier ahead of the first frame.
+
+    Returns True when emotion analysis is usable.
+    """
+    if not backends.CV2_AVAILABLE or not backends.DEEPFACE_AVAILABLE:
+        return False
+    _load_emotion_model()
+    return True
+
+def preprocess_faces(face_imgs):
+    """Convert BGR crops to a (N, 48, 48, 1) float batch in [0, 1]"""
+    if hasattr(face_imgs, 'batch'):
+        # FaceCrops: vectorized, into a reused buffer
+        return face_imgs.batch()[..., np.newaxis]
+    cv2 = backends.cv2
+    batch = np.empty((len(face_imgs), EMOTION_INPUT_SIZE, EMOTION_INPUT_SIZE, 1), dtype=np.float32)
+    for i, face in enumerate(face_imgs):
+        gray = cv2.cvtColor(face, cv2.COLOR_BGR2GRAY)
+        batch[i, :, :, 0] = cv2.resize(gray, (EMOTION_INPUT_SIZE, EMOTION_INPUT_SIZE),
+                                       interpolation=cv2.INTER_AREA)
+    batch *= 1.0 / 255.0
+    return batch
+
+def scores_to_results(predictions):
+    """Turn (N, 7) classifier output into [(emotions_dict, dominant), ...]"""
+    predictions = np.asarray(predictions, dtype=np.float64)
+    totals = predictions.sum(axis=1, keepdims=True)
+    totals[totals == 0] = 1.0
+    percents = 100.0 * predictions / totals
+    dominant_idx = percents.argmax(axis=1)
+    return [
+        ({label: float(score) for label, score in zip(EMOTION_LABELS, row)}, EMOTION_LABELS[idx])
+        for row, idx in zip(percents, dominant_idx)
+    ]
+
+def analyze_emotions(face_imgs):
+    """Analyze face crops (a list of images or a FaceCrops), returning
+    [(emotions, dominant), ...]
+
+    Entries are (None, None) where analysis failed, matching analyze_emotion().
+    """
+    if not face_imgs:
+        return []
+    if not backends.CV2_AVAILABLE or not backends.DEEPFACE_AVAILABLE:
+        return [(None, None)] * len(face_imgs)
+
+    model = _load_emotion_model()
+    if model is not None:
+        try:
+            predictions = model.predict(preprocess_faces(face_imgs), verbose=0)
+            return scores_to_results(predictions)
+        except Exception as e:
+            print(f"Batched emotion analysis failed, falling back: {e}")
+
+    return [analyze_emotion(face) for face in face_imgs]
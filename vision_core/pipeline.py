@@ -0,0 +1,160 @@
+"""
+Detect -> crop -> track -> analyze pipeline shared by the desktop tool and
+the server.
+"""
+
+from .backends import np
+from .emotion import analyze_emotions
+from .preprocess import FaceCrops, boxes_array, crop_regions
+
+# Crop settings: pixels of context around each YOLO box, and the smallest
+# padded crop (in either dimension) worth sending to the emotion model
+CROP_PADDING = 10
+MIN_FACE_SIZE = 20
+# Expand padded crops to squares so faces keep their aspect ratio at 48x48
+SQUARE_CROPS = True
+
+def boxes_from_results(results):
+    """Flatten YOLO results into one (N, 4) int array of [x1, y1, x2, y2] boxes"""
+    arrays = []
+    for result in results:
+        xyxy = result.boxes.xyxy
+        if hasattr(xyxy, 'cpu'):
+            xyxy = xyxy.cpu().numpy()  # One device-to-host copy per result, not per value
+        arrays.append(np.asarray(xyxy, dtype=np.float32).reshape(-1, 4))
+    if not arrays:
+        return boxes_array([])
+    return np.concatenate(arrays).astype(np.int64)
+
+def crop_faces(frame, boxes, pad=CROP_PADDING, min_size=MIN_FACE_SIZE, square=SQUARE_CROPS):
+    """Crop padded face regions, skipping crops smaller than min_size.
+
+    Returns (kept_boxes, crops); kept_boxes are the unpadded detector boxes
+    as lists of ints.
+    crops is a FaceCrops: iterating it gives views into frame, and
+    crops.batch() gives the classifier input for all faces at once.
+    """
+    if len(boxes) == 0:
+        return [], FaceCrops()
+    keep, regions = crop_regions(boxes, frame.shape, pad, min_size, square)
+    kept_boxes = boxes_array(boxes)[keep].tolist()
+    return kept_boxes, FaceCrops([(frame, regions)])
+
+def _iou(a, b):
+    ix1, iy1 = max(a[0], b[0]), max(a[1], b[1])
+    ix2, iy2 = min(a[2], b[2]), min(a[3], b[3])
+    inter = max(0, ix2 - ix1) * max(0, iy2 - iy1)
+    if inter == 0:
+        return 0.0
+    area_a = (a[2] - a[0]) * (a[3] - a[1])
+    area_b = (b[2] - b[0]) * (b[3] - b[1])
+    return inter / float(area_a + area_b - inter)
+
+class FaceTracker:
+    """Greedy IoU tracker giving faces stable ids across frames"""
+
+    def __init__(self, iou_threshold=0.3, max_missed=5):
+        self.iou_threshold = iou_threshold
+        self.max_missed = max_missed
+        self.tracks = {}  # track_id -> {'bbox': [...], 'missed': int}
+        self._next_id = 0
+
+    def update(self, boxes):
+        """Match boxes to existing tracks; returns a track id per box"""
+        candidates = []
+        for track_id, track in self.tracks.items():
+            for box_idx, box in enumerate(boxes):
+                overlap = _iou(track['bbox'], box)
+                if overlap >= self.iou_threshold:
+                    candidates.append((overlap, track_id, box_idx))
+        candidates.sort(reverse=True)
+
+        assigned = [None] * len(boxes)
+        matched_tracks = set()
+        for overlap, track_id, box_idx in candidates:
+            if track_id in matched_tracks or assigned[box_idx] is not None:
+                continue
+            assigned[box_idx] = track_id
+            matched_tracks.add(track_id)
+
+        for box_idx, box in enumerate(boxes):
+            if assigned[box_idx] is None:
+                assigned[box_idx] = self._next_id
+                self._next_id += 1
+            self.tracks[assigned[box_idx]] = {'bbox': box, 'missed': 0}
+
+        for track_id in list(self.tracks):
+            if track_id not in assigned:
+                self.tracks[track_id]['missed'] += 1
+                if self.tracks[track_id]['missed'] > self.max_missed:
+                    del self.tracks[track_id]
+
+        return assigned
+
+    def reset(self):
+        self.tracks.clear()
+
+class EmotionPipeline:
+    """Runs detection, cropping, tracking and batched emotion analysis.
+
+    analyze_every=N re-runs the emotion model on a tracked face only every
+    Nth frame and reuses its last result in between; new tracks are always
+    analyzed immediately.
+    """
+
+    def __init__(self, detector, confidence=0.5, pad=CROP_PADDING, min_size=MIN_FACE_SIZE,
+                 analyze_every=1, analyzer=analyze_emotions, tracker=None):
+        self.detector = detector
+        self.confidence = confidence
+        self.pad = pad
+        self.min_size = min_size
+        self.analyze_every = max(1, analyze_every)
+        self.analyzer = analyzer
+        self.tracker = tracker if tracker is not None else FaceTracker()
+        self.frame_count = 0
+        self._cache = {}  # track_id -> (emotions, dominant)
+
+    def detect(self, frame):
+        results = self.detector(frame, verbose=False, conf=self.confidence)
+        return boxes_from_results(results)
+
+    def process(self, frame, boxes=None):
+        """Return one dict per usable face: bbox, track_id, emotions, dominant_emotion.
+
+        emotions/dominant_emotion are None for faces not analyzed yet.
+        """
+        self.frame_count += 1
+        if boxes is None:
+            boxes = self.detect(frame)
+        boxes, crops = crop_faces(frame, boxes, self.pad, self.min_size)
+        track_ids = self.tracker.update(boxes)
+
+        refresh = self.frame_count % self.analyze_every == 0
+        pending = [i for i, track_id in enumerate(track_ids)
+                   if refresh or track_id not in self._cache]
+        if pending:
+            results = self.analyzer(crops.select(pending))
+            for i, (emotions, dominant) in zip(pending, results):
+                if emotions:
+                    self._cache[track_ids[i]] = (emotions, dominant)
+
+        # Forget cached emotions of tracks that are gone
+        for track_id in list(self._cache):
+            if track_id not in self.tracker.tracks:
+                del self._cache[track_id]
+
+        faces = []
+        for box, track_id in zip(boxes, track_ids):
+            emotions, dominant = self._cache.get(track_id, (None, None))
+            faces.append({
+                'bbox': box,
+                'track_id': track_id,
+                'emotions': emotions,
+                'dominant_emotion': dominant
+            })
+        return faces
+
+    def reset(self):
+        self.tracker.reset()
+        self._cache.clear()
+        self.frame_count = 0
@@ -0,0 +1,125 @@
+"""
+Drawing helpers for emotion overlays.
+"""
+
+from . import backends
+
+# Emotion colors (BGR format)
+EMOTION_COLORS = {
+    'angry': (0, 0, 255),      # Red
+    'disgust': (0, 128, 0),    # Dark Green
+    'fear': (128, 0, 128),     # Purple
+    'happy': (0, 255, 255),    # Yellow
+    'sad': (255, 0, 0),        # Blue
+    'surprise': (0, 165, 255), # Orange
+    'neutral': (200, 200, 200) # Gray
+}
+
+# Emotion emojis
+EMOTION_EMOJIS = {
+    'angry': '😠',
+    'disgust': '🤢',
+    'fear': '😨',
+    'happy': '😊',
+    'sad': '😢',
+    'surprise': '😲',
+    'neutral': '😐'
+}
+
+def draw_fancy_box(frame, x1, y1, x2, y2, color, thickness=2):
+    """Draw a fancy bounding box with corner accents"""
+    cv2 = backends.cv2
+    cv2.rectangle(frame, (x1, y1), (x2, y2), color, thickness)
+
+    # Corner length
+    corner_len = min(20, (x2-x1)//4, (y2-y1)//4)
+
+    # Top-left corner
+    cv2.line(frame, (x1, y1), (x1 + corner_len, y1), color, thickness + 2)
+    cv2.line(frame, (x1, y1), (x1, y1 + corner_len), color, thickness + 2)
+
+    # Top-right corner
+    cv2.line(frame, (x2, y1), (x2 - corner_len, y1), color, thickness + 2)
+    cv2.line(frame, (x2, y1), (x2, y1 + corner_len), color, thickness + 2)
+
+    # Bottom-left corner
+    cv2.line(frame, (x1, y2), (x1 + corner_len, y2), color, thickness + 2)
+    cv2.line(frame, (x1, y2), (x1, y2 - corner_len), color, thickness + 2)
+
+    # Bottom-right corner
+    cv2.line(frame, (x2, y2), (x2 - corner_len, y2), color, thickness + 2)
+    cv2.line(frame, (x2, y2), (x2, y2 - corner_len), color, thickness + 2)
+
+def draw_label_box(frame, text, x, y, color, bg_alpha=0.7):
+    """Draw text with a semi-transparent background"""
+    cv2 = backends.cv2
+    font = cv2.FONT_HERSHEY_SIMPLEX
+    font_scale = 0.7
+    thickness = 2
+
+    (text_w, text_h), baseline = cv2.getTextSize(text, font, font_scale, thickness)
+
+    # Blend only the label region instead of copying the whole frame
+    h, w = frame.shape[:2]
+    top, bottom = max(0, y - text_h - 10), min(h, y)
+    left, right = max(0, x), min(w, x + text_w + 10)
+    if bottom > top and right > left:
+        roi = frame[top:bottom, left:right]
+        overlay = roi.copy()
+        overlay[:] = color
+        cv2.addWeighted(overlay, bg_alpha, roi, 1 - bg_alpha, 0, roi)
+
+    # Draw text
+    cv2.putText(frame, text, (x + 5, y - 5), font, font_scale, (255, 255, 255), thickness)
+
+def draw_emotion_bar(frame, emotions_dict, x, y, width=150, height=15):
+    """Draw emotion probability bars"""
+    cv2 = backends.cv2
+    y_offset = 0
+    for emotion, score in sorted(emotions_dict.items(), key=lambda x: -x[1]):
+        color = EMOTION_COLORS.get(emotion, (200, 200, 200))
+
+        # Background bar
+        cv2.rectangle(frame, (x, y + y_offset), (x + width, y + y_offset + height), (50, 50, 50), -1)
+
+        # Filled bar (score is 0-100 from DeepFace)
+        bar_width = int(width * score / 100)
+        cv2.rectangle(frame, (x, y + y_offset), (x + bar_width, y + y_offset + height), color, -1)
+
+        # Label
+        label = f"{emotion[:3].upper()}: {score:.0f}%"
+        cv2.putText(frame, label, (x + 5, y + y_offset + height - 3),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.35, (255, 255, 255), 1)
+
+        y_offset += height + 2
+
+def draw_faces(frame, faces, show_bars=True):
+    """Draw boxes, labels and (optionally) emotion bars for pipeline faces"""
+    cv2 = backends.cv2
+    for face in faces:
+        x1, y1, x2, y2 = face['bbox']
+        emotions_dict = face.get('emotions')
+        dominant_emotion = face.get('dominant_emotion')
+
+        if emotions_dict:
+            # Get color for this emotion
+            color = EMOTION_COLORS.get(dominant_emotion, (0, 255, 0))
+
+            # Draw fancy bounding box
+            draw_fancy_box(frame, x1, y1, x2, y2, color, 2)
+
+            # Create label
+            confidence = emotions_dict.get(dominant_emotion, 0)
+            label = f"{dominant_emotion.upper()} {confidence:.0f}%"
+
+            # Draw label
+            draw_label_box(frame, label, x1, y1 - 5, color)
+
+            # Draw emotion bars if enabled
+            if show_bars and x2 + 170 < frame.shape[1]:
+                draw_emotion_bar(frame, emotions_dict, x2 + 10, y1, 150, 12)
+        else:
+            # Face detected but analyzing
+            cv2.rectangle(frame, (x1, y1), (x2, y2), (100, 100, 100), 2)
+            cv2.putText(frame, "ANALYZING...", (x1, y1-10),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.5, (100, 100, 100), 1)
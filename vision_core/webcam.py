@@ -0,0 +1,123 @@
+"""
+Interactive webcam demo used by emotion_track.py and emotion_tracking.py.
+"""
+
+from . import backends
+from .pipeline import EmotionPipeline, CROP_PADDING, MIN_FACE_SIZE
+from .rendering import draw_faces
+
+def run_webcam_demo(model_path, confidence=0.5, pad=CROP_PADDING, min_size=MIN_FACE_SIZE,
+                    analyze_every=3, camera_index=0):
+    print("=" * 50)
+    print("🎭 EMOTION RECOGNITION SYSTEM")
+    print("=" * 50)
+
+    if not backends.CV2_AVAILABLE:
+        print("OpenCV not available. Cannot run emotion recognition.")
+        return
+
+    if not backends.YOLO_AVAILABLE:
+        print("YOLO (ultralytics) not available. Cannot run emotion recognition.")
+        return
+
+    if not backends.DEEPFACE_AVAILABLE:
+        print("DeepFace not available. Cannot run emotion recognition.")
+        return
+
+    print("Loading models...")
+    cv2 = backends.cv2
+
+    # Load YOLO face detection model
+    model = backends.YOLO(model_path)
+    print("✅ YOLO Face Detection Model Loaded")
+
+    # Initialize DeepFace (it downloads models on first use)
+    print("✅ DeepFace Emotion Detector Ready")
+
+    pipeline = EmotionPipeline(model, confidence=confidence, pad=pad, min_size=min_size,
+                               analyze_every=analyze_every)
+
+    # Start webcam
+    cap = cv2.VideoCapture(camera_index)
+    cap.set(cv2.CAP_PROP_FRAME_WIDTH, 1280)
+    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 720)
+
+    if not cap.isOpened():
+        print(" Error: Could not open webcam!")
+        return
+
+    print("\n🎥 Webcam Started!")
+    print(" Controls:")
+    print("   [Q] - Quit")
+    print("   [S] - Screenshot")
+    print("   [B] - Toggle emotion bars")
+    print("   [M] - Toggle mirror mode")
+    print("=" * 50)
+
+    show_bars = True
+    mirror_mode = True  # Start with mirrored view (natural for users)
+    frame_count = 0
+
+    while True:
+        ret, frame = cap.read()
+        if not ret:
+            break
+
+        frame_count += 1
+
+        # Apply mirror effect if enabled (flip horizontally)
+        if mirror_mode:
+            frame = cv2.flip(frame, 1)  # 1 = horizontal flip
+
+        # Detect, track and analyze before drawing so overlays never leak into crops
+        faces = pipeline.process(frame)
+
+        # Draw directly on the frame; the crops are no longer needed
+        display_frame = frame
+
+        # Add title overlay
+        cv2.rectangle(display_frame, (0, 0), (400, 40), (30, 30, 30), -1)
+        cv2.putText(display_frame, "EMOTION RECOGNITION", (10, 28),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 255, 255), 2)
+
+        draw_faces(display_frame, faces, show_bars)
+
+        # Show face count
+        cv2.putText(display_frame, f"Faces: {len(faces)}", (10, 70),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
+
+        # Show mirror mode indicator
+        mirror_indicator = "🪞 MIRRORED" if mirror_mode else "📷 NORMAL"
+        cv2.putText(display_frame, mirror_indicator, (display_frame.shape[1] - 150, 30),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 255), 2)
+
+        # Show controls hint
+        mirror_status = "ON" if mirror_mode else "OFF"
+        cv2.putText(display_frame, f"Press Q to quit | S to screenshot | B to toggle bars | M to toggle mirror ({mirror_status})",
+                    (10, display_frame.shape[0] - 10),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.5, (150, 150, 150), 1)
+
+        # Display the frame
+        cv2.imshow("Emotion Recognition - Hackathon Demo", display_frame)
+
+        # Handle key presses
+        key = cv2.waitKey(1) & 0xFF
+
+        if key == ord('q'):
+            print("\n👋 Exiting...")
+            break
+        elif key == ord('s'):
+            filename = f"screenshot_{frame_count}.png"
+            cv2.imwrite(filename, display_frame)
+            print(f"📸 Screenshot saved: {filename}")
+        elif key == ord('b'):
+            show_bars = not show_bars
+            print(f"📊 Emotion bars: {'ON' if show_bars else 'OFF'}")
+        elif key == ord('m'):
+            mirror_mode = not mirror_mode
+            pipeline.reset()  # Boxes jump to the other side of the frame
+            print(f"🪞 Mirror mode: {'ON' if mirror_mode else 'OFF'}")
+
+    cap.release()
+    cv2.destroyAllWindows()
+    print("✅ Cleanup complete!")